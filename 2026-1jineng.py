@@ -5,12 +5,22 @@ from typing import List, Tuple
 
 import pandas as pd
 import streamlit as st
+from streamlit import runtime
 from streamlit_autorefresh import st_autorefresh
 from streamlit_echarts import st_echarts
 import plotly.graph_objects as go
 
+from jineng_cache import CacheManager, OpsMetrics, WarmupWorker
+from jineng_charts import (
+    DISPLAY_MODES, SCORE_DIMENSIONS, TOP_N, chart_ability, chart_bullet_advanced, chart_bullet_base,
+    chart_heat, chart_stack, chart_total, default_display_mode, get_score_cols,
+)
+from jineng_store import PeriodFrames, ShardedPeriods, calc_all_sum, frame_token, load_periods, store_version
+from jineng_writer import StaleEditError, WorkbookWriter
+
 # ==================== 页面基础配置 ====================
 st.set_page_config(page_title="技能覆盖分析大屏", layout="wide")
+RERUN_START = time.perf_counter()
 
 PAGE_CSS = """
 <style>
@@ -118,111 +128,86 @@ if SAVE_FILE is None:
     SAVE_FILE = "jixiao.xlsx"
 
 
-# 全局配色池（多颜色，区分不同时间点）
-COLOR_POOL = [
-    "#FF3333", "#33FF33", "#3333FF", "#FFAA00", "#9933FF",
-    "#00FFFF", "#FF99CC", "#FFFF33", "#008080", "#FF00FF",
-    "#8B4513", "#20B2AA", "#FF6347", "#9370DB", "#32CD32"
-]
-
-# ==================== 工具函数 ====================
-def get_excel_writer(file_path: str, mode: str = "w") -> pd.ExcelWriter:
-    if mode == "a" and os.path.exists(file_path):
-        return pd.ExcelWriter(file_path, mode="a", if_sheet_exists="replace", engine="openpyxl")
-    return pd.ExcelWriter(file_path, engine="openpyxl")
-
-def calc_score_sum(df: pd.DataFrame, score_col: str) -> pd.DataFrame:
-    """统一计算单维度分数总和"""
-    if score_col not in df.columns or "明细" not in df.columns:
-        return df
-    sum_col_name = f"{score_col}_数量总和"
-    if sum_col_name in df.columns:
-        df = df.drop(columns=[sum_col_name])
-    sum_df = df.groupby("明细", as_index=False)[score_col].sum().rename(columns={score_col: sum_col_name})
-    df = df.merge(sum_df, on="明细", how="left")
-    return df
-
-def calc_all_sum(df: pd.DataFrame) -> pd.DataFrame:
-    """一次性计算自评+互评两个总和"""
-    df = calc_score_sum(df, "自评值")
-    df = calc_score_sum(df, "互评值")
-    return df
-
 # ==================== 数据加载 ====================
-@st.cache_data(ttl=300)
-def load_sheets(file: str, ts=None) -> Tuple[List[str], dict]:
-    if not os.path.exists(file):
-        return [], {}
-    xpd = pd.ExcelFile(file)
-    frames = {}
-    required_cols = {"明细", "员工", "自评值", "互评值"}
-
-    for s in xpd.sheet_names:
-        try:
-            df0 = pd.read_excel(xpd, sheet_name=s)
-            if df0.empty:
-                continue
-            df0 = df0.fillna("")
-            if not required_cols.issubset(df0.columns):
-                st.sidebar.warning(f"表 {s} 缺少必要列，已跳过。")
-                continue
-
-            if df0.iloc[0, 0] == "分组":
-                groups = df0.iloc[0, 1:].tolist()
-                df0 = df0.drop(0).reset_index(drop=True)
-                emp_cols = [c for c in df0.columns if c not in ["明细", "自评值_数量总和", "互评值_数量总和", "编号"]]
-                group_map = {emp: groups[i] if i < len(groups) else "默认分组" for i, emp in enumerate(emp_cols)}
-                df_long = df0.melt(
-                    id_vars=["明细"],
-                    value_vars=emp_cols,
-                    var_name="员工",
-                    value_name="临时值"
-                )
-                df_long["分组"] = df_long["员工"].map(group_map)
-                df_long["自评值"] = pd.to_numeric(df_long["临时值"], errors="coerce").fillna(0)
-                df_long["互评值"] = pd.to_numeric(df_long["临时值"], errors="coerce").fillna(0)
-                df_long = df_long.drop(columns=["临时值"], errors="ignore")
-                frames[s] = df_long
-            else:
-                if "分组" not in df0.columns:
-                    df0["分组"] = "默认分组"
-                df0["自评值"] = pd.to_numeric(df0["自评值"], errors="coerce").fillna(0)
-                df0["互评值"] = pd.to_numeric(df0["互评值"], errors="coerce").fillna(0)
-                frames[s] = df0
-        except Exception as e:
-            st.sidebar.error(f"读取 {s} 失败: {str(e)}")
-    return xpd.sheet_names, frames
+@st.cache_resource
+def get_cache() -> CacheManager:
+    """进程级缓存管理器：数据、合并视图、图表共用一个内存预算"""
+    return CacheManager()
+
+@st.cache_resource
+def get_metrics() -> OpsMetrics:
+    """进程级运维指标（环形缓冲区）"""
+    return OpsMetrics()
+
+@st.cache_resource
+def get_warmup() -> WarmupWorker:
+    """进程级缓存预热线程池"""
+    return WarmupWorker()
+
+def after_commit():
+    """写入落盘后清空缓存，并立即按新数据版本在后台预热（不必等下一次页面刷新发现版本变化）。
+    open_store、warmup_tasks 定义在后面，回调执行时才查找"""
+    CACHE.invalidate()
+    version = store_version(SAVE_FILE)
+    WARMUP.submit(version, lambda: warmup_tasks(version, open_store(version)))
+
+@st.cache_resource
+def get_writer() -> WorkbookWriter:
+    """进程级单写者队列：所有会话的保存/新建/重算都在同一线程串行写入，落盘后清空缓存并预热"""
+    return WorkbookWriter(SAVE_FILE, on_commit=after_commit)
+
+CACHE = get_cache()
+CACHE.enforce()
+METRICS = get_metrics()
+WARMUP = get_warmup()
+WRITER = get_writer()
+# 等待写入队列完成的最长时间（秒）
+WRITE_TIMEOUT = 120
+
+def active_sessions():
+    """Streamlit 当前连接的会话数（含未操作的大屏）；不在 Streamlit 服务中运行时为 "-"。
+    1.28 未公开 SessionManager 的访问入口，只能经 Runtime 的内部属性取得"""
+    session_mgr = getattr(runtime.get_instance(), "_session_mgr", None) if runtime.exists() else None
+    return session_mgr.num_active_sessions() if session_mgr is not None else "-"
+
+def load_and_record(file: str) -> Tuple[List[str], PeriodFrames, list]:
+    """加载单个分片工作簿并检查总和列（每个数据版本只执行一次；可能在预热线程中调用，提示信息留给页面显示）"""
+    start = time.perf_counter()
+    sheets, frames, messages = load_periods(file)
+    METRICS.record_load((file, os.path.getmtime(file) if os.path.exists(file) else None), time.perf_counter() - start)
+
+    # 自动修复总和列：增量时间点物化时已重新计算总和，只需检查完整快照
+    repaired = 0
+    for sheet_name, df0 in frames.snapshots.items():
+        df_new = calc_all_sum(df0)
+        if not df0.equals(df_new):
+            # 经写入队列保存，不在加载中等待；落盘后数据版本变化，下次刷新读取修复后的数据。
+            # 其他会话已修复或修改了同一张表时以对方为准
+            WRITER.save(sheet_name, df_new, frame_token(df0))
+            repaired += 1
+    if repaired:
+        messages.append(("info", f"自动修复 {repaired} 张表的数量总和"))
+    return sheets, frames, messages
+
+def open_store(version: tuple) -> ShardedPeriods:
+    """某个数据版本的数据集（进程内共享，同一版本只加载一次）"""
+    return CACHE.get_or_build("数据", version, lambda: ShardedPeriods.open(SAVE_FILE, loader=load_and_record))
 
 # 初始化数据
 sheets, sheet_frames = [], {}
+DATA_VERSION = ((SAVE_FILE, None),)
 try:
-    mtime = os.path.getmtime(SAVE_FILE) if os.path.exists(SAVE_FILE) else None
-    sheets, sheet_frames = load_sheets(SAVE_FILE, ts=mtime)
-    st.sidebar.success(f"已加载文件: {SAVE_FILE}")
-
-    # 自动修复总和列
-    repaired_count = 0
-    repaired_frames = {}
-    for sheet_name, df0 in sheet_frames.items():
-        df_new = calc_all_sum(df0)
-        if not df0.equals(df_new):
-            repaired_count += 1
-            repaired_frames[sheet_name] = df_new
-    if repaired_frames:
-        with get_excel_writer(SAVE_FILE, mode="w") as writer:
-            for sn, df0 in sheet_frames.items():
-                if sn in repaired_frames:
-                    repaired_frames[sn].to_excel(writer, sheet_name=sn, index=False)
-                    sheet_frames[sn] = repaired_frames[sn]
-                else:
-                    df0.to_excel(writer, sheet_name=sn, index=False)
-        st.cache_data.clear()
-        st.sidebar.info(f"自动修复 {repaired_count} 张表的数量总和")
+    # 工作簿（分片时为分片索引及各分片）修改时间即数据版本；已加载的分片和分组分区随缓存对象跨次刷新复用
+    DATA_VERSION = store_version(SAVE_FILE)
+    sheet_frames = open_store(DATA_VERSION)
+    sheets = sheet_frames.period_names()
+    st.sidebar.success(f"已加载文件: {SAVE_FILE}" + (f"（{len(sheet_frames.files())} 个分片，按需加载）" if sheet_frames.sharded else ""))
 
 except Exception as e:
     st.sidebar.warning(f"读取文件失败: {str(e)}")
+    DATA_VERSION = (("示例数据", None),)
     # 示例测试数据
-    sheet_frames = {
+    sheet_frames = ShardedPeriods.from_frames("示例数据", PeriodFrames({
         "2025_01": pd.DataFrame({
             "明细": ["任务A", "任务B", "任务C", "任务A", "任务B", "任务C"],
             "自评值_数量总和": [3, 2, 5, 3, 2, 5],
@@ -241,8 +226,8 @@ except Exception as e:
             "互评值": [3, 4, 5],
             "分组": ["A8", "B7", "VN"]
         })
-    }
-    sheets = ["2025_01", "2026_02"]
+    }))
+    sheets = sheet_frames.period_names()
 
 # ==================== 侧边栏 - 新增时间点 ====================
 st.sidebar.markdown("### 新增数据时间点")
@@ -262,7 +247,6 @@ if st.sidebar.button("创建新的时间点"):
         st.sidebar.error(f"时间点 {new_sheet_name} 已存在！")
     else:
         try:
-            base_df = pd.DataFrame(columns=["明细", "自评值_数量总和", "互评值_数量总和", "员工", "自评值", "互评值", "分组"])
             prev_sheets = sorted([s for s in sheets if s.split("_")[0] == str(year) and s < new_sheet_name])
             if not prev_sheets:
                 prev_years = sorted([int(s.split("_")[0]) for s in sheets if s.split("_")[0].isdigit()])
@@ -270,17 +254,15 @@ if st.sidebar.button("创建新的时间点"):
                     latest_prev_year = max(y for y in prev_years if y < year) if any(y < year for y in prev_years) else None
                     if latest_prev_year:
                         prev_sheets = sorted([s for s in sheets if s.startswith(str(latest_prev_year))])
-            if prev_sheets:
-                prev_name = prev_sheets[-1]
-                base_df = sheet_frames.get(prev_name, base_df).copy()
+            prev_name = prev_sheets[-1] if prev_sheets else None
+            # 同一分片内写时复制：只记录继承关系和一张空增量表，不复制上期数据
+            if WRITER.create(new_sheet_name, prev_name).result(timeout=WRITE_TIMEOUT):
                 st.sidebar.info(f"继承上期数据: {prev_name}")
             else:
                 st.sidebar.info("无上期数据，创建空白模板")
-
-            with get_excel_writer(SAVE_FILE, mode="a") as writer:
-                base_df.to_excel(writer, sheet_name=new_sheet_name, index=False)
-            st.cache_data.clear()
             st.sidebar.success(f"创建成功: {new_sheet_name}")
+        except StaleEditError as e:
+            st.sidebar.error(str(e))
         except Exception as e:
             st.sidebar.error(f"创建失败: {str(e)}")
 
@@ -288,37 +270,44 @@ if st.sidebar.button("创建新的时间点"):
 st.sidebar.markdown("### 数据修复工具")
 if st.sidebar.button("一键更新所有表总和"):
     try:
-        if not os.path.exists(SAVE_FILE):
+        # 索引表和增量表不含总和列，原样保留
+        if not WRITER.recalc_sums().result(timeout=WRITE_TIMEOUT):
             st.sidebar.warning("未找到 jixiao.xlsx")
         else:
-            xls = pd.ExcelFile(SAVE_FILE)
-            updated_frames = {}
-            for sheet_name in xls.sheet_names:
-                df0 = pd.read_excel(xls, sheet_name=sheet_name)
-                df0 = calc_all_sum(df0)
-                updated_frames[sheet_name] = df0
-            with get_excel_writer(SAVE_FILE, mode="w") as writer:
-                for sn, df0 in updated_frames.items():
-                    df0.to_excel(writer, sheet_name=sn, index=False)
-            st.cache_data.clear()
             st.sidebar.success("所有工作表总和已更新！")
     except Exception as e:
         st.sidebar.error(f"更新失败: {str(e)}")
 
+if sheet_frames and not sheet_frames.sharded and os.path.exists(SAVE_FILE):
+    # 拆分后各年份独立成工作簿，启动与保存只涉及所选年份；原工作簿保留作归档
+    if st.sidebar.button("按年份拆分存储"):
+        try:
+            index_file = WRITER.split_by_year().result(timeout=WRITE_TIMEOUT)
+            st.sidebar.success(f"已拆分，分片索引: {index_file}")
+        except Exception as e:
+            st.sidebar.error(f"拆分失败: {str(e)}")
+
+with st.sidebar.expander("缓存状态"):
+    st.caption(
+        f"进程内存 {CACHE.rss_fn() / 1024 / 1024:.0f} MB / 告警线 {CACHE.rss_limit / 1024 / 1024:.0f} MB，"
+        f"缓存预算 {CACHE.target_bytes() / 1024 / 1024:.0f} MB，"
+        f"缓存占用 {CACHE.tracked_bytes() / 1024 / 1024:.1f} MB"
+    )
+    st.dataframe(CACHE.stats(), hide_index=True, use_container_width=True)
+
 # ==================== 侧边栏 - 筛选器 ====================
 all_time_list = sheets
-time_choice = st.sidebar.multiselect("选择月份/季度（支持跨年份）", all_time_list, default=all_time_list[:1])
+# 默认只选最新时间点，启动时只需加载当年分片
+default_periods = sheet_frames.latest() if sheet_frames else []
+time_choice = st.sidebar.multiselect("选择月份/季度（支持跨年份）", all_time_list, default=default_periods)
 
-all_groups = []
-if sheet_frames:
-    all_df_concat = pd.concat(sheet_frames.values())
-    all_groups = all_df_concat["分组"].dropna().unique().tolist()
+all_groups = sheet_frames.group_catalogue() if sheet_frames else []
 selected_groups = st.sidebar.multiselect("选择分组", all_groups, default=all_groups)
 
 # 分数维度（全局变量，所有图表共用）
 score_dimension = st.sidebar.radio(
     "分数维度",
-    ["自评分数", "互评分数", "双维度对比"],
+    SCORE_DIMENSIONS,
     horizontal=True,
     index=2
 )
@@ -326,417 +315,94 @@ score_dimension = st.sidebar.radio(
 # 视图选择
 view = st.sidebar.radio(
     "切换视图",
-    ["编辑数据", "大屏轮播", "单页模式", "显示所有视图", "能力分析", "基础子弹图", "高级子弹图"]
+    ["编辑数据", "大屏轮播", "单页模式", "显示所有视图", "能力分析", "基础子弹图", "高级子弹图", "运维监控"]
 )
 
 # ==================== 数据合并函数 ====================
+def view_key(version, keys: List[str], groups: List[str]) -> tuple:
+    return version, tuple(keys), tuple(groups)
+
+def chart_key(version, builder, keys: List[str], groups: List[str], args: tuple) -> tuple:
+    return view_key(version, keys, groups) + (builder.__name__, tuple(tuple(x) if isinstance(x, list) else x for x in args))
+
 def get_merged_df(keys: List[str], groups: List[str]) -> pd.DataFrame:
-    dfs = []
-    for k in keys:
-        df0 = sheet_frames.get(k)
-        if df0 is None:
-            continue
-        if groups and "分组" in df0.columns:
-            df0 = df0[df0["分组"].isin(groups)]
-        df0["自评值"] = pd.to_numeric(df0["自评值"], errors="coerce").fillna(0)
-        df0["互评值"] = pd.to_numeric(df0["互评值"], errors="coerce").fillna(0)
-        dfs.append(df0)
-    if not dfs:
+    keys = [k for k in keys if k in sheet_frames]
+    if not keys:
         st.warning("当前无可用数据，请重新选择时间/分组")
         return pd.DataFrame()
-    merged_df = pd.concat(dfs, axis=0, ignore_index=True)
-    merged_df = merged_df[merged_df["明细"].notna() & (merged_df["明细"] != "") & (merged_df["明细"] != "分数总和")]
-    return merged_df
+    # 各时间点已按分组预分区（数值列、无效明细行已清洗），这里只拼接所选分区
+    return CACHE.get_or_build("合并视图", view_key(DATA_VERSION, keys, groups), lambda: sheet_frames.merged(keys, groups))
 
 df = get_merged_df(time_choice, selected_groups)
-
-# ==================== 图表公共函数 ====================
-def get_score_cols() -> Tuple[str, str]:
-    if score_dimension == "自评分数":
-        return "自评值", "自评分数"
-    elif score_dimension == "互评分数":
-        return "互评值", "互评分数"
-    else:
-        return "自评值", "互评值"
-
-# 1. 人员排名柱状图
-def chart_total(df0: pd.DataFrame):
-    if df0.empty:
-        return go.Figure()
-    s1, s2 = get_score_cols()
-    fig = go.Figure()
-    if score_dimension == "双维度对比":
-        emp_stats = df0.groupby("员工").agg({"自评值":"sum","互评值":"sum"}).reset_index()
-        emp_stats = emp_stats.sort_values("自评值", ascending=False)
-        fig.add_trace(go.Bar(x=emp_stats["员工"], y=emp_stats["自评值"], name="自评", marker_color="#4cc9f0"))
-        fig.add_trace(go.Bar(x=emp_stats["员工"], y=emp_stats["互评值"], name="互评", marker_color="#f72585"))
-        fig.update_layout(barmode="group", xaxis_title="员工", yaxis_title="总分")
-    else:
-        emp_stats = df0.groupby("员工")[s1].sum().sort_values(ascending=False).reset_index()
-        fig.add_trace(go.Bar(x=emp_stats["员工"], y=emp_stats[s1], name=s2))
-        fig.update_layout(xaxis_title="员工", yaxis_title=s2)
-    fig.update_layout(template="plotly_dark", legend=dict(orientation="h", y=-0.2))
-    return fig
-
-# 2. 任务对比堆叠柱状图
-def chart_stack(df0: pd.DataFrame):
-    if df0.empty:
-        return go.Figure()
-    fig = go.Figure()
-    agg_df = df0.groupby(["明细", "员工"])[["自评值", "互评值"]].sum().reset_index()
-
-    if score_dimension == "双维度对比":
-        for emp in agg_df["员工"].unique():
-            sub = agg_df[agg_df["员工"] == emp]
-            fig.add_trace(go.Bar(x=sub["明细"], y=sub["互评值"], name=f"互评-{emp}", marker_color="#f72585", opacity=0.7))
-            fig.add_trace(go.Bar(x=sub["明细"], y=sub["自评值"], name=f"自评-{emp}", marker_color="#4cc9f0", opacity=0.8))
-    else:
-        col, name_text = get_score_cols()
-        for emp in agg_df["员工"].unique():
-            sub = agg_df[agg_df["员工"] == emp]
-            fig.add_trace(go.Bar(x=sub["明细"], y=sub[col], name=emp))
-
-    fig.update_layout(
-        barmode="stack",
-        template="plotly_dark",
-        xaxis_title="任务",
-        yaxis_title="分数",
-        legend=dict(orientation="h", y=-0.2)
-    )
-    return fig
-
-# ===================== 热力图函数（已改为白底+深色文字） =====================
-def chart_heat(df0: pd.DataFrame):
-    # 全局空数据拦截
-    if df0.empty:
-        return {
-            "title": {"text": "暂无有效数据", "left": "center", "textStyle": {"color": "#333333"}},
-            "backgroundColor": "#ffffff"
-        }
-
-    # 提取维度并去重、清洗
-    task_list = df0["明细"].dropna().unique().tolist()
-    user_list = df0["员工"].dropna().unique().tolist()
-
-    # 维度为空拦截
-    if len(task_list) == 0 or len(user_list) == 0:
-        return {
-            "title": {"text": "任务/人员数据为空，无法生成热力图", "left": "center", "textStyle": {"color": "#333333"}},
-            "backgroundColor": "#ffffff"
-        }
-
-    # 数据透视聚合，强制填充0，规避索引异常
-    try:
-        pivot_self = df0.groupby(["明细", "员工"])["自评值"].sum().unstack(fill_value=0)
-        pivot_peer = df0.groupby(["明细", "员工"])["互评值"].sum().unstack(fill_value=0)
-    except Exception:
-        return {
-            "title": {"text": "数据格式异常，生成失败", "left": "center", "textStyle": {"color": "#333333"}},
-            "backgroundColor": "#ffffff"
-        }
-
-    data = []
-    title_text = ""
-    color_list = []
-    min_val = 0
-    max_val = 0
-
-    # 分支1：自评分数
-    if score_dimension == "自评分数":
-        title_text = "自评分数 热力图"
-        color_list = ["#e8f4f8", "#4cc9f0"]
-        all_vals = []
-        for y_idx, task in enumerate(task_list):
-            for x_idx, user in enumerate(user_list):
-                val = float(pivot_self.loc[task, user]) if task in pivot_self.index and user in pivot_self.columns else 0
-                data.append([x_idx, y_idx, val])
-                all_vals.append(val)
-        min_val = min(all_vals) if all_vals else 0
-        max_val = max(all_vals) if all_vals else 0
-
-    # 分支2：互评分数
-    elif score_dimension == "互评分数":
-        title_text = "互评分数 热力图"
-        color_list = ["#fff0f3", "#f72585"]
-        all_vals = []
-        for y_idx, task in enumerate(task_list):
-            for x_idx, user in enumerate(user_list):
-                val = float(pivot_peer.loc[task, user]) if task in pivot_peer.index and user in pivot_peer.columns else 0
-                data.append([x_idx, y_idx, val])
-                all_vals.append(val)
-        min_val = min(all_vals) if all_vals else 0
-        max_val = max(all_vals) if all_vals else 0
-
-    # 分支3：双维度差值
-    else:
-        title_text = "自评-互评 分数差值热力图"
-        color_list = ["#f72585", "#ffffff", "#4cc9f0"]
-        all_diff = []
-        for y_idx, task in enumerate(task_list):
-            for x_idx, user in enumerate(user_list):
-                s = float(pivot_self.loc[task, user]) if task in pivot_self.index and user in pivot_self.columns else 0
-                p = float(pivot_peer.loc[task, user]) if task in pivot_peer.index and user in pivot_peer.columns else 0
-                diff = round(s - p, 1)
-                data.append([x_idx, y_idx, diff])
-                all_diff.append(diff)
-        min_val = min(all_diff) if all_diff else -1
-        max_val = max(all_diff) if all_diff else 1
-
-    # 兜底极值
-    if min_val == max_val:
-        min_val -= 1
-        max_val += 1
-
-    # ECharts 配置：白底 + 深色文字/坐标轴
-    option = {
-        "backgroundColor": "#ffffff",
-        "title": {
-            "text": title_text,
-            "left": "center",
-            "textStyle": {"color": "#333333", "fontSize": 16}
-        },
-        "tooltip": {
-            "trigger": "item",
-            "formatter": "人员：{b}<br/>任务：{a}<br/>数值：{c}"
-        },
-        "grid": {"left": "3%", "right": "3%", "top": "12%", "bottom": "18%", "containLabel": True},
-        "xAxis": {
-            "type": "category",
-            "data": user_list,
-            "axisLabel": {"color": "#333333", "rotate": 45, "fontSize": 11},
-            "axisLine": {"lineStyle": {"color": "#999999"}}
-        },
-        "yAxis": {
-            "type": "category",
-            "data": task_list,
-            "axisLabel": {"color": "#333333", "fontSize": 11},
-            "axisLine": {"lineStyle": {"color": "#999999"}}
-        },
-        "visualMap": {
-            "min": min_val,
-            "max": max_val,
-            "show": True,
-            "orient": "horizontal",
-            "left": "center",
-            "bottom": "8%",
-            "inRange": {"color": color_list},
-            "textStyle": {"color": "#333333"}
-        },
-        "series": [{
-            "name": "分数",
-            "type": "heatmap",
-            "data": data,
-            "label": {"show": True, "color": "#000000", "fontSize": 10},
-            "itemStyle": {"borderColor": "#eeeeee", "borderWidth": 1},
-            "emphasis": {"itemStyle": {"shadowBlur": 8}}
-        }]
-    }
-    return option
-
-# ===================== 子弹图 =====================
-def chart_bullet_base(df0: pd.DataFrame, dim: str = "员工"):
-    if df0.empty:
-        return go.Figure()
-    if dim == "员工":
-        agg = df0.groupby("员工").agg({"自评值":"sum","互评值":"sum"}).reset_index()
-        cat_col = "员工"
-        title = "员工自评/互评对比"
-    else:
-        agg = df0.groupby("明细").agg({"自评值":"sum","互评值":"sum"}).reset_index()
-        cat_col = "明细"
-        title = "任务自评/互评对比"
-
-    fig = go.Figure()
-    # 底层：自评（正常宽度）
-    fig.add_trace(go.Bar(
-        y=agg[cat_col],
-        x=agg["自评值"],
-        orientation="h",
-        name="自评分数",
-        marker_color="#ff7f0e",
-        opacity=1.0,
-        width=0.6
-    ))
-    # 上层：互评（宽度收窄、上浮、透明度60%）
-    fig.add_trace(go.Bar(
-        y=agg[cat_col],
-        x=agg["互评值"],
-        orientation="h",
-        name="互评分数",
-        marker_color="#4cc9f0",
-        opacity=0.8,
-        width=0.4
-    ))
-
-    fig.update_layout(
-        title=title,
-        template="plotly_dark",
-        height=max(400, len(agg)*40),
-        legend=dict(orientation="h", y=-0.15, x=0.5, xanchor="center"),
-        barmode="overlay",
-        xaxis=dict(title="分数", showgrid=True, gridcolor="#444"),
-        yaxis=dict(title=cat_col, showgrid=False),
-        margin=dict(l=10, r=10, t=40, b=60)
-    )
-    return fig
-
-def chart_bullet_advanced(df0: pd.DataFrame, dim: str = "员工"):
-    if df0.empty:
-        return go.Figure()
-    if dim == "员工":
-        agg_df = df0.groupby("员工").agg({"自评值":"sum","互评值":"sum"}).reset_index()
-        cat_col = "员工"
-        title = "【高级版】员工自评&互评分数对比"
-    else:
-        agg_df = df0.groupby("明细").agg({"自评值":"sum","互评值":"sum"}).reset_index()
-        cat_col = "明细"
-        title = "【高级版】任务自评&互评分数对比"
-
-    agg_df = agg_df.sort_values("互评值", ascending=True).reset_index(drop=True)
-    all_max = max(agg_df["自评值"].max(), agg_df["互评值"].max()) * 1.2
-
-    fig = go.Figure()
-    # 底层：自评
-    fig.add_trace(go.Bar(
-        y=agg_df[cat_col],
-        x=agg_df["自评值"],
-        orientation="h",
-        marker_color="#ff7f0e",
-        name="自评分数",
-        opacity=1.0,
-        width=0.6
-    ))
-    # 上层：互评（窄宽度+透明度60%）
-    fig.add_trace(go.Bar(
-        y=agg_df[cat_col],
-        x=agg_df["互评值"],
-        orientation="h",
-        marker_color="#4cc9f0",
-        name="互评分数",
-        opacity=0.8,
-        width=0.4
-    ))
-
-    fig.update_layout(
-        title=title,
-        template="plotly_dark",
-        height=max(450, len(agg_df)*42),
-        xaxis=dict(range=[0, all_max], title="分数", gridcolor="#444"),
-        yaxis=dict(title=cat_col),
-        legend=dict(orientation="h", y=-0.18, xanchor="center", x=0.5),
-        barmode="overlay",
-        margin=dict(l=10, r=10, t=40, b=65)
-    )
-    return fig
-
-# ===================== 能力分析 =====================
-def chart_ability(df0: pd.DataFrame, selected_emps: List[str]):
-    if df0.empty:
-        return go.Figure(), go.Figure(), go.Figure()
-    tasks = df0["明细"].unique().tolist()
-    fig1, fig2, fig3 = go.Figure(), go.Figure(), go.Figure()
-
-    for idx, sheet in enumerate(time_choice):
-        color = COLOR_POOL[idx % len(COLOR_POOL)]
-        df_sheet = get_merged_df([sheet], selected_groups)
-        if df_sheet.empty:
-            continue
-        pivot_self = df_sheet.pivot_table(index="明细", columns="员工", values="自评值", aggfunc="sum", fill_value=0)
-        pivot_peer = df_sheet.pivot_table(index="明细", columns="员工", values="互评值", aggfunc="sum", fill_value=0)
-
-        # 根据分数维度动态渲染曲线
-        for emp in selected_emps:
-            # 仅自评
-            if score_dimension == "自评分数":
-                if emp in pivot_self.columns:
-                    fig1.add_trace(go.Scatter(
-                        x=tasks, y=pivot_self[emp].reindex(tasks, fill_value=0),
-                        mode="lines+markers", name=f"{sheet}-{emp}",
-                        line=dict(color=color, width=3), marker=dict(size=7)
-                    ))
-            # 仅互评
-            elif score_dimension == "互评分数":
-                if emp in pivot_peer.columns:
-                    fig1.add_trace(go.Scatter(
-                        x=tasks, y=pivot_peer[emp].reindex(tasks, fill_value=0),
-                        mode="lines+markers", name=f"{sheet}-{emp}",
-                        line=dict(color=color, width=3), marker=dict(size=7)
-                    ))
-            # 双维度
-            else:
-                if emp in pivot_self.columns:
-                    fig1.add_trace(go.Scatter(
-                        x=tasks, y=pivot_self[emp].reindex(tasks, fill_value=0),
-                        mode="lines+markers", name=f"{sheet}-{emp}(自评)",
-                        line=dict(color=color, width=3), marker=dict(size=7)
-                    ))
-                if emp in pivot_peer.columns:
-                    fig1.add_trace(go.Scatter(
-                        x=tasks, y=pivot_peer[emp].reindex(tasks, fill_value=0),
-                        mode="lines+markers", name=f"{sheet}-{emp}(互评)",
-                        line=dict(color=color, width=3, dash="dash"), marker=dict(size=7)
-                    ))
-
-        # 任务汇总曲线
-        if score_dimension == "自评分数":
-            sum_data = pivot_self.sum(axis=1).reindex(tasks, fill_value=0)
-            fig2.add_trace(go.Scatter(
-                x=tasks, y=sum_data, mode="lines+markers",
-                name=f"{sheet}", line=dict(color=color, width=3)
-            ))
-        elif score_dimension == "互评分数":
-            sum_data = pivot_peer.sum(axis=1).reindex(tasks, fill_value=0)
-            fig2.add_trace(go.Scatter(
-                x=tasks, y=sum_data, mode="lines+markers",
-                name=f"{sheet}", line=dict(color=color, width=3)
-            ))
-        else:
-            sum_self = pivot_self.sum(axis=1).reindex(tasks, fill_value=0)
-            sum_peer = pivot_peer.sum(axis=1).reindex(tasks, fill_value=0)
-            fig2.add_trace(go.Scatter(
-                x=tasks, y=sum_self, mode="lines+markers",
-                name=f"{sheet}(自评)", line=dict(color=color, width=3)
-            ))
-            fig2.add_trace(go.Scatter(
-                x=tasks, y=sum_peer, mode="lines+markers",
-                name=f"{sheet}(互评)", line=dict(color=color, width=3, dash="dash")
-            ))
-
-        # 员工总分曲线
-        if score_dimension == "自评分数":
-            emp_sum = pivot_self.sum(axis=0)
-            fig3.add_trace(go.Scatter(
-                x=emp_sum.index, y=emp_sum.values, mode="lines+markers",
-                name=f"{sheet}", line=dict(color=color, width=3)
-            ))
-        elif score_dimension == "互评分数":
-            emp_sum = pivot_peer.sum(axis=0)
-            fig3.add_trace(go.Scatter(
-                x=emp_sum.index, y=emp_sum.values, mode="lines+markers",
-                name=f"{sheet}", line=dict(color=color, width=3)
-            ))
-        else:
-            emp_sum_self = pivot_self.sum(axis=0)
-            emp_sum_peer = pivot_peer.sum(axis=0)
-            fig3.add_trace(go.Scatter(
-                x=emp_sum_self.index, y=emp_sum_self.values, mode="lines+markers",
-                name=f"{sheet}(自评)", line=dict(color=color, width=3)
-            ))
-            fig3.add_trace(go.Scatter(
-                x=emp_sum_peer.index, y=emp_sum_peer.values, mode="lines+markers",
-                name=f"{sheet}(互评)", line=dict(color=color, width=3, dash="dash")
-            ))
-
-    # 统一布局
-    title_map = {
-        "自评分数": "员工任务完成曲线（自评）",
-        "互评分数": "员工任务完成曲线（互评）",
-        "双维度对比": "员工任务完成曲线（双维度）"
-    }
-    fig1.update_layout(title=title_map[score_dimension], template="plotly_dark", legend=dict(orientation="h", y=-0.25))
-    fig2.update_layout(title="任务整体趋势", template="plotly_dark", legend=dict(orientation="h", y=-0.25))
-    fig3.update_layout(title="员工总分对比", template="plotly_dark", legend=dict(orientation="h", y=-0.25))
-    return fig1, fig2, fig3
+# 分片加载时的提示只显示一次
+while sheet_frames and sheet_frames.messages:
+    level, text = sheet_frames.messages.pop(0)
+    getattr(st.sidebar, level)(text)
+
+# 排名图与子弹图的展示方式：人数较多时默认只画前/后 N 名
+display_mode = st.sidebar.radio(
+    "排名/子弹图展示方式",
+    DISPLAY_MODES,
+    horizontal=True,
+    index=DISPLAY_MODES.index(default_display_mode(df))
+)
+top_n = st.sidebar.slider("前/后 N 名", 5, 50, TOP_N) if display_mode == "前N名/后N名" else TOP_N
+
+# ==================== 图表缓存 ====================
+def cached_chart(builder, df0: pd.DataFrame, *args, **derived):
+    """按 数据版本+筛选条件+参数 缓存图表；df0 与 derived 由筛选条件唯一确定，不参与键。
+    只记录未命中时的构建耗时，命中率另见缓存统计"""
+    key = chart_key(DATA_VERSION, builder, time_choice, selected_groups, args)
+
+    def build():
+        start = time.perf_counter()
+        chart = builder(df0, *args, **derived)
+        METRICS.record_latency(builder.__name__, time.perf_counter() - start)
+        return chart
+    return CACHE.get_or_build("图表", key, build)
+
+# ==================== 缓存预热 ====================
+def warmup_tasks(version, frames: ShardedPeriods) -> list:
+    """默认筛选（最新时间点 + 全部分组）下的合并视图，以及各分数维度/对比维度的图表。
+    任务开始后数据版本又变化时，跳过剩余构建，结果也不再放入缓存"""
+    keys, groups = frames.latest(), frames.group_catalogue()
+    if not keys:
+        return []
+
+    def current() -> bool:
+        return WARMUP.is_current(version)
+
+    def merged(ks: List[str]) -> pd.DataFrame:
+        return CACHE.get_or_build("合并视图", view_key(version, ks, groups), lambda: frames.merged(ks, groups),
+                                  keep=current)
+
+    def task(builder, *args):
+        def run():
+            df0 = merged(keys)
+            if not current():
+                return
+            call_args, derived = args, {}
+            if builder is chart_ability:
+                # 与能力分析视图默认选中全部员工一致
+                emps = df0["员工"].unique().tolist() if "员工" in df0.columns else []
+                call_args = (emps,) + args
+                derived["sheet_dfs"] = [(k, merged([k])) for k in keys]
+            elif builder in (chart_total, chart_bullet_base, chart_bullet_advanced):
+                call_args = args + (default_display_mode(df0), TOP_N)
+            CACHE.get_or_build("图表", chart_key(version, builder, keys, groups, call_args),
+                               lambda: builder(df0, *call_args, **derived), keep=current)
+        return run
+
+    tasks = [lambda: merged(keys)]
+    for sd in SCORE_DIMENSIONS:
+        tasks += [task(builder, sd) for builder in (chart_total, chart_stack, chart_heat, chart_ability)]
+    for builder in (chart_bullet_base, chart_bullet_advanced):
+        tasks += [task(builder, d) for d in ("员工", "明细")]
+    return tasks
+
+# 本进程的写入在提交回调中已开始预热；这里补上首次启动和外部修改工作簿的情况（版本未变时直接返回）
+if default_periods:
+    WARMUP.submit(DATA_VERSION, lambda: warmup_tasks(DATA_VERSION, sheet_frames))
 
 # 指标卡片
 def show_cards(df0: pd.DataFrame):
@@ -744,7 +410,7 @@ def show_cards(df0: pd.DataFrame):
         return
     total_task = df0["明细"].nunique()
     total_emp = df0["员工"].nunique()
-    s1, s2 = get_score_cols()
+    s1, s2 = get_score_cols(score_dimension)
 
     if score_dimension == "双维度对比":
         g_self = df0.groupby("员工")["自评值"].sum()
@@ -780,18 +446,31 @@ if view == "编辑数据":
         st.warning("请先选择时间点再编辑数据")
     else:
         show_cards(df)
+        sheet_name = time_choice[0]
+        # 乐观并发：编辑基准是本会话开始编辑该时间点时的数据指纹，保存成功或被拒绝后才更换；
+        # 表格组件以指纹为 key，基准更换时编辑内容随之重置为最新数据
+        edit_bases = st.session_state.setdefault("edit_bases", {})
+        if sheet_name not in edit_bases:
+            edit_bases[sheet_name] = frame_token(sheet_frames[sheet_name]) if sheet_name in sheet_frames else ""
+        base_token = edit_bases[sheet_name]
         st.info("直接编辑表格，修改后可点击下方按钮保存或刷新总和")
-        edited_df = st.data_editor(df, num_rows="dynamic", use_container_width=True)
+        edited_df = st.data_editor(df, num_rows="dynamic", use_container_width=True, key=f"编辑_{sheet_name}_{base_token}")
 
         # 按钮顺序：保存在上，更新总和在下
         if st.button("💾 保存修改到Excel文件"):
             try:
-                sheet_name = time_choice[0]
                 edited_df = calc_all_sum(edited_df)
-                with get_excel_writer(SAVE_FILE, mode="a") as writer:
-                    edited_df.to_excel(writer, sheet_name=sheet_name, index=False)
-                st.cache_data.clear()
+                # 增量时间点只写变更行；变更过多时自动重新存为完整快照
+                # 交给写入队列：与他人同时保存时合并为一次写入，只改写该时间点所在分片
+                WRITER.save(sheet_name, edited_df, base_token).result(timeout=WRITE_TIMEOUT)
+                # 保存后的数据成为新的编辑基准（即下次刷新加载的版本）
+                saved = open_store(store_version(SAVE_FILE))
+                edit_bases[sheet_name] = frame_token(saved[sheet_name]) if sheet_name in saved else ""
                 st.success(f"已保存至 {sheet_name}")
+            except StaleEditError as e:
+                # 下次刷新以最新数据重新开始编辑
+                edit_bases.pop(sheet_name, None)
+                st.error(f"保存被拒绝: {str(e)}")
             except Exception as e:
                 st.error(f"保存失败: {str(e)}")
 
@@ -806,11 +485,12 @@ elif view == "大屏轮播":
     else:
         st_autorefresh(interval=10000, key="auto_ref")
         show_cards(df)
-        chart_list = [("人员排名", chart_total(df)), ("任务堆叠图", chart_stack(df)), ("热力图", chart_heat(df))]
+        chart_list = [("人员排名", chart_total), ("任务堆叠图", chart_stack), ("热力图", chart_heat)]
         if "carousel_idx" not in st.session_state:
             st.session_state.carousel_idx = 0
         st.session_state.carousel_idx = (st.session_state.carousel_idx + 1) % len(chart_list)
-        name, opt = chart_list[st.session_state.carousel_idx]
+        name, builder = chart_list[st.session_state.carousel_idx]
+        opt = cached_chart(builder, df, score_dimension, *((display_mode, top_n) if builder is chart_total else ()))
         st.subheader(name)
         if isinstance(opt, go.Figure):
             st.plotly_chart(opt, use_container_width=True)
@@ -826,13 +506,13 @@ elif view == "单页模式":
         show_cards(df)
         opt_name = st.sidebar.selectbox("选择图表", ["人员完成任务数量排名","任务对比（堆叠柱状图）","任务-人员热力图"])
         if opt_name == "人员完成任务数量排名":
-            fig = chart_total(df)
+            fig = cached_chart(chart_total, df, score_dimension, display_mode, top_n)
             st.plotly_chart(fig, use_container_width=True)
         elif opt_name == "任务对比（堆叠柱状图）":
-            fig = chart_stack(df)
+            fig = cached_chart(chart_stack, df, score_dimension)
             st.plotly_chart(fig, use_container_width=True)
         else:
-            opt = chart_heat(df)
+            opt = cached_chart(chart_heat, df, score_dimension)
             st.markdown('<div class="heatmap-container">', unsafe_allow_html=True)
             st_echarts(opt, height=f"{max(600, len(df['明细'].unique())*28)}px", theme="dark")
             st.markdown('</div>', unsafe_allow_html=True)
@@ -843,11 +523,11 @@ elif view == "显示所有视图":
     else:
         show_cards(df)
         st.subheader("人员完成任务数量排名")
-        st.plotly_chart(chart_total(df), use_container_width=True)
+        st.plotly_chart(cached_chart(chart_total, df, score_dimension, display_mode, top_n), use_container_width=True)
         st.subheader("任务对比（堆叠柱状图）")
-        st.plotly_chart(chart_stack(df), use_container_width=True)
+        st.plotly_chart(cached_chart(chart_stack, df, score_dimension), use_container_width=True)
         st.subheader("任务-人员热力图")
-        opt = chart_heat(df)
+        opt = cached_chart(chart_heat, df, score_dimension)
         st.markdown('<div class="heatmap-container">', unsafe_allow_html=True)
         st_echarts(opt, height=f"{max(600, len(df['明细'].unique())*28)}px", theme="dark")
         st.markdown('</div>', unsafe_allow_html=True)
@@ -859,7 +539,8 @@ elif view == "能力分析":
         st.subheader("能力分析图表")
         emp_list = df["员工"].unique().tolist()
         sel_emp = st.sidebar.multiselect("选择展示员工", emp_list, default=emp_list)
-        f1,f2,f3 = chart_ability(df, sel_emp)
+        f1,f2,f3 = cached_chart(chart_ability, df, sel_emp, score_dimension,
+                                sheet_dfs=[(s, get_merged_df([s], selected_groups)) for s in time_choice])
         st.plotly_chart(f1, use_container_width=True)
         st.plotly_chart(f2, use_container_width=True)
         st.plotly_chart(f3, use_container_width=True)
@@ -871,7 +552,7 @@ elif view == "基础子弹图":
         st.subheader("基础自评-互评子弹图")
         dim = st.radio("对比维度", ["员工维度","任务维度"], horizontal=True)
         d = "员工" if dim == "员工维度" else "明细"
-        fig = chart_bullet_base(df, d)
+        fig = cached_chart(chart_bullet_base, df, d, display_mode, top_n)
         st.plotly_chart(fig, use_container_width=True)
 
 elif view == "高级子弹图":
@@ -881,5 +562,69 @@ elif view == "高级子弹图":
         st.subheader("高级自评-互评子弹图")
         dim = st.radio("对比维度", ["员工维度","任务维度"], horizontal=True)
         d = "员工" if dim == "员工维度" else "明细"
-        fig = chart_bullet_advanced(df, d)
+        fig = cached_chart(chart_bullet_advanced, df, d, display_mode, top_n)
         st.plotly_chart(fig, use_container_width=True)
+
+elif view == "运维监控":
+    st_autorefresh(interval=5000, key="ops_ref")
+    proc = METRICS.process_stats()
+    c1,c2,c3,c4 = st.columns(4)
+    c1.markdown(f"""<div class='metric-card'><div class='metric-value'>{proc['rss_mb']:.0f}</div><div class='metric-label'>进程内存RSS（MB）</div></div>""", unsafe_allow_html=True)
+    c2.markdown(f"""<div class='metric-card'><div class='metric-value'>{proc['cpu_percent']:.1f}</div><div class='metric-label'>CPU占用（%）</div></div>""", unsafe_allow_html=True)
+    c3.markdown(f"""<div class='metric-card'><div class='metric-value'>{active_sessions()}</div><div class='metric-label'>活跃会话</div></div>""", unsafe_allow_html=True)
+    c4.markdown(f"""<div class='metric-card'><div class='metric-value'>{proc['uptime_s'] / 3600:.1f}</div><div class='metric-label'>运行时长（小时）</div></div>""", unsafe_allow_html=True)
+    st.markdown("<hr/>", unsafe_allow_html=True)
+
+    st.subheader("数据版本")
+    last = METRICS.last_load()
+    version_file, version_ts = max(DATA_VERSION, key=lambda v: v[1] or 0)
+    version_text = datetime.fromtimestamp(version_ts).strftime("%Y-%m-%d %H:%M:%S") if version_ts else "-"
+    if last:
+        loaded_at = datetime.fromtimestamp(last[1]).strftime("%Y-%m-%d %H:%M:%S")
+        st.info(f"最近修改：{version_file}（{version_text}）；最近加载 {os.path.basename(str(last[0][0]))} 于 {loaded_at}，耗时 {last[2] * 1000:.0f} ms")
+    else:
+        st.info(f"最近修改：{version_file}（{version_text}），本进程尚未加载")
+
+    st.subheader("各时间点行数")
+    # 未加载的分片只列出位置，不为统计而加载
+    row_stats = pd.DataFrame(
+        [{
+            "时间点": name,
+            "分片": os.path.basename(sheet_frames.file_for(name)),
+            "存储方式": f"增量（基于 {sheet_frames.manifest[name]}）" if sheet_frames.is_delta(name) else "快照",
+            "存储行数": len(sheet_frames.deltas[name]) if sheet_frames.is_delta(name) else len(sheet_frames.snapshots[name]),
+            # 增量时间点尚未物化时不为统计而物化
+            "行数": sheet_frames.row_count(name),
+        } if sheet_frames.loaded(name) else {
+            "时间点": name, "分片": os.path.basename(sheet_frames.file_for(name)), "存储方式": "未加载",
+        } for name in sheet_frames],
+        columns=["时间点", "分片", "存储方式", "存储行数", "行数"]
+    ).astype({"存储行数": "Int64", "行数": "Int64"})
+    st.dataframe(row_stats, hide_index=True, use_container_width=True)
+
+    st.subheader("图表构建耗时（缓存未命中时）")
+    st.dataframe(METRICS.latency_table(), hide_index=True, use_container_width=True)
+
+    st.subheader("写入队列")
+    ws = WRITER.stats()
+    w1,w2,w3,w4 = st.columns(4)
+    w1.markdown(f"""<div class='metric-card'><div class='metric-value'>{ws['queue_depth']}</div><div class='metric-label'>排队中（峰值 {ws['peak_depth']}）</div></div>""", unsafe_allow_html=True)
+    w2.markdown(f"""<div class='metric-card'><div class='metric-value'>{ws['ops_per_min']:.1f}</div><div class='metric-label'>写入操作/分钟（近5分钟）</div></div>""", unsafe_allow_html=True)
+    w3.markdown(f"""<div class='metric-card'><div class='metric-value'>{ws['avg_batch_s'] * 1000:.0f}</div><div class='metric-label'>平均批次耗时（ms）</div></div>""", unsafe_allow_html=True)
+    w4.markdown(f"""<div class='metric-card'><div class='metric-value'>{ws['avg_wait_s'] * 1000:.0f}</div><div class='metric-label'>平均等待（ms）</div></div>""", unsafe_allow_html=True)
+    st.caption(
+        f"{'写入中' if ws['busy'] else '空闲'}：累计提交 {ws['submitted']}，完成 {ws['applied']}，"
+        f"合并 {ws['coalesced']}，拒绝（版本冲突）{ws['rejected']}，失败 {ws['failed']}，"
+        f"批次 {ws['batches']}，写入表 {ws['sheets_per_min']:.1f}/分钟"
+    )
+
+    st.subheader("缓存")
+    st.dataframe(CACHE.stats(), hide_index=True, use_container_width=True)
+    warm = WARMUP.status()
+    warm_state = "进行中" if warm["running"] else "已完成"
+    st.caption(
+        f"缓存预热{warm_state}：{warm['done']}/{warm['total']}，失败 {warm['failed']}，"
+        f"累计取消 {warm['cancelled']}，耗时 {warm['elapsed_s']:.1f} s"
+    )
+
+METRICS.record_latency("页面刷新", time.perf_counter() - RERUN_START)
@@ -0,0 +1,196 @@
+"""本地 JSON 聚合接口：与大屏共用加载与聚合代码，仅依赖标准库 http.server
+
+用法：
+    python jineng_api.py --file jixiao.xlsx --port 8502
+
+接口（periods / groups 参数可用逗号分隔或重复传入；periods 默认最新时间点，groups 默认全部分组）：
+    GET /api/periods                       时间点列表
+    GET /api/groups                        分组列表
+    GET /api/employees?periods=&groups=    员工自评/互评总分
+    GET /api/tasks?periods=&groups=        任务自评/互评总分
+    GET /api/heatmap?periods=&groups=      任务×员工 自评/互评矩阵
+
+响应带数据版本 ETag（If-None-Match 命中返回 304），客户端声明 gzip 时压缩返回。
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import sys
+import threading
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from jineng_cache import CacheManager
+from jineng_charts import heat_matrix, score_totals
+from jineng_store import ShardedPeriods, store_version
+
+ENDPOINTS = ["/api/periods", "/api/groups", "/api/employees", "/api/tasks", "/api/heatmap"]
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _list_param(query: Dict[str, List[str]], name: str) -> List[str]:
+    """逗号分隔或重复传入的参数值，去重并保持首次出现顺序（重复的时间点不能重复累加）"""
+    return list(dict.fromkeys(v for item in query.get(name, []) for v in item.split(",") if v))
+
+
+def _json_bytes(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, default=lambda o: o.item() if hasattr(o, "item") else str(o)).encode("utf-8")
+
+
+class AggregateAPI:
+    """请求处理核心：handle() 只接收路径与请求头、返回 (状态码, 响应头, 正文)，不依赖套接字，便于直接调用测试"""
+
+    def __init__(self, file: str, cache: Optional[CacheManager] = None):
+        self.file = file
+        self.cache = cache or CacheManager()
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self._frames: Optional[ShardedPeriods] = None
+
+    # ---------- 数据版本 ----------
+    def data(self) -> Tuple[str, ShardedPeriods]:
+        """工作簿（分片时为索引及各分片）修改时间即数据版本；版本变化时重新打开，旧版本的结果缓存随之失效。
+        分片按请求涉及的时间点按需加载"""
+        version = hashlib.sha1(repr(store_version(self.file)).encode("utf-8")).hexdigest()[:12]
+        with self._lock:
+            if version != self._version:
+                frames = ShardedPeriods.open(self.file)
+                for level, text in frames.messages:
+                    print(f"[{level}] {text}", file=sys.stderr)
+                self._version, self._frames = version, frames
+                self.cache.invalidate("接口")
+            return self._version, self._frames
+
+    # ---------- 接口实现 ----------
+    def _select(self, frames: ShardedPeriods, query: Dict[str, List[str]]):
+        periods = _list_param(query, "periods") or frames.latest()
+        missing = [p for p in periods if p not in frames]
+        if missing:
+            raise ApiError(400, f"时间点不存在：{', '.join(missing)}")
+        groups = _list_param(query, "groups") or frames.group_catalogue()
+        return periods, groups, frames.merged(periods, groups)
+
+    def _payload(self, route: str, frames: ShardedPeriods, query: Dict[str, List[str]]) -> dict:
+        if route == "/api/periods":
+            # 只读索引，不触发分片加载；存储方式只对已加载的分片给出，其余为 null
+            manifest = frames.manifest
+            return {"periods": [
+                {"时间点": s,
+                 "存储方式": ("增量" if frames.is_delta(s) else "快照") if frames.loaded(s) else None,
+                 "基准": manifest.get(s)}
+                for s in frames.period_names()
+            ]}
+        if route == "/api/groups":
+            return {"groups": frames.group_catalogue()}
+
+        periods, groups, df0 = self._select(frames, query)
+        result = {"periods": periods, "groups": groups}
+        if route in ("/api/employees", "/api/tasks"):
+            by = "员工" if route == "/api/employees" else "明细"
+            result["items"] = score_totals(df0, by).to_dict(orient="records") if not df0.empty else []
+        else:
+            if df0.empty:
+                result.update({"tasks": [], "employees": [], "自评值": [], "互评值": []})
+            else:
+                tasks, users, pivot_self, pivot_peer = heat_matrix(df0)
+                result.update({"tasks": tasks, "employees": users,
+                               "自评值": pivot_self.values.tolist(), "互评值": pivot_peer.values.tolist()})
+        return result
+
+    def handle(self, path: str, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        parts = urlsplit(path)
+        route = parts.path.rstrip("/") or "/"
+        query = parse_qs(parts.query)
+        headers = {k.lower(): v for k, v in headers.items()}
+        if route not in ENDPOINTS:
+            return self._error(404, f"未知接口 {route}，可用：{', '.join(ENDPOINTS)}")
+        try:
+            version, frames = self.data()
+            # 参数规范化后参与缓存键与 ETag，顺序不同的同一查询共享结果
+            params = tuple((k, tuple(sorted(_list_param(query, k)))) for k in ("periods", "groups"))
+            if route == "/api/periods":
+                # 存储方式只对已加载的分片给出，已加载的时间点也参与缓存键与 ETag
+                params += (("loaded", tuple(s for s in frames.period_names() if frames.loaded(s))),)
+            key = (version, route, params)
+            etag = '"%s-%s"' % (version, hashlib.sha1(repr((route, params)).encode("utf-8")).hexdigest()[:12])
+
+            if_none_match = headers.get("if-none-match", "")
+            if etag in [t.strip().replace("W/", "", 1) for t in if_none_match.split(",")] or if_none_match.strip() == "*":
+                return 304, {"ETag": etag, "Cache-Control": "no-cache"}, b""
+
+            def build():
+                raw = _json_bytes(dict(self._payload(route, frames, query), version=version))
+                return raw, gzip.compress(raw, compresslevel=6)
+            raw, zipped = self.cache.get_or_build("接口", key, build)
+        except ApiError as e:
+            return self._error(e.status, str(e))
+        except Exception as e:
+            # 其余异常也以 JSON 返回，避免客户端只看到连接被断开
+            traceback.print_exc(file=sys.stderr)
+            return self._error(500, f"服务器内部错误：{e}")
+
+        out_headers = {
+            "Content-Type": "application/json; charset=utf-8",
+            "ETag": etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        body = raw
+        if "gzip" in headers.get("accept-encoding", ""):
+            body = zipped
+            out_headers["Content-Encoding"] = "gzip"
+        return 200, out_headers, body
+
+    @staticmethod
+    def _error(status: int, message: str) -> Tuple[int, Dict[str, str], bytes]:
+        return status, {"Content-Type": "application/json; charset=utf-8"}, _json_bytes({"error": message})
+
+
+# ==================== HTTP 服务 ====================
+def make_handler(api: AggregateAPI):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            status, headers, body = api.handle(self.path, dict(self.headers.items()))
+            self.send_response(status)
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def make_server(api: AggregateAPI, host: str = "127.0.0.1", port: int = 8502) -> ThreadingHTTPServer:
+    """port=0 时由系统分配空闲端口（server.server_address[1]）"""
+    return ThreadingHTTPServer((host, port), make_handler(api))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="技能覆盖分析 JSON 聚合接口")
+    parser.add_argument("--file", default="jixiao.xlsx", help="数据文件，默认 jixiao.xlsx")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址，默认仅本机")
+    parser.add_argument("--port", type=int, default=8502, help="监听端口，默认 8502")
+    args = parser.parse_args(argv)
+
+    server = make_server(AggregateAPI(args.file), args.host, args.port)
+    print(f"接口已启动：http://{args.host}:{server.server_address[1]}/api/periods")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+"""按内存预算管理的进程内缓存：数据、合并视图、图表共用一个预算"""
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+import pandas as pd
+import psutil
+
+# 默认缓存预算（MB，只计缓存条目本身），可通过环境变量 JINENG_CACHE_MB 调整
+DEFAULT_BUDGET_MB = int(os.environ.get("JINENG_CACHE_MB", "512"))
+# 进程 RSS 告警线（MB），超过时把缓存收缩到预算的一半，可通过环境变量 JINENG_RSS_MB 调整
+DEFAULT_RSS_LIMIT_MB = int(os.environ.get("JINENG_RSS_MB", "1536"))
+
+
+# ==================== 内存估算 ====================
+def estimate_size(obj: Any, _depth: int = 0) -> int:
+    """估算对象占用字节数（DataFrame 按深度统计，图表按 JSON 结构递归）"""
+    if hasattr(obj, "memory_bytes"):
+        return int(obj.memory_bytes())
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if hasattr(obj, "to_plotly_json"):
+        return estimate_size(obj.to_plotly_json(), _depth + 1)
+    if _depth > 20:
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set)):
+        return sys.getsizeof(obj) + sum(estimate_size(v, _depth + 1) for v in obj)
+    return sys.getsizeof(obj)
+
+def process_rss() -> int:
+    return psutil.Process(os.getpid()).memory_info().rss
+
+
+# ==================== 缓存管理 ====================
+class _Entry:
+    __slots__ = ("value", "size", "cost", "priority")
+
+    def __init__(self, value: Any, size: int, cost: float, priority: float):
+        self.value = value
+        self.size = size
+        self.cost = cost
+        self.priority = priority
+
+
+class CacheManager:
+    """GreedyDual-Size 淘汰：优先级 = 全局水位 + 构建耗时/占用MB，
+    既照顾最近访问，也优先保留构建昂贵、体积小的条目。
+    缓存总量超过预算时按优先级从低到高淘汰；进程 RSS 超过告警线时目标降为预算的一半。
+    RSS 中运行时、依赖库等非缓存部分无法靠淘汰释放，所以只按缓存占用计算淘汰量。"""
+
+    def __init__(self, budget_mb: int = DEFAULT_BUDGET_MB, rss_fn: Callable[[], int] = process_rss,
+                 rss_limit_mb: int = DEFAULT_RSS_LIMIT_MB):
+        self.budget = budget_mb * 1024 * 1024
+        self.rss_limit = rss_limit_mb * 1024 * 1024
+        self.rss_fn = rss_fn
+        self._entries: Dict[str, Dict[Hashable, _Entry]] = defaultdict(dict)
+        # 正在构建的条目：(命名空间, 键) → 构建完成事件，同一条目只由一个线程构建
+        self._building: Dict[tuple, threading.Event] = {}
+        self._lock = threading.RLock()
+        self._clock = 0.0
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+        self.evictions: Dict[str, int] = defaultdict(int)
+
+    def _priority(self, size: int, cost: float) -> float:
+        return self._clock + cost / max(size / (1024 * 1024), 0.001)
+
+    def get(self, namespace: str, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries[namespace].get(key)
+            if entry is None:
+                return None
+            self.hits[namespace] += 1
+            if hasattr(entry.value, "memory_bytes"):
+                entry.size = estimate_size(entry.value)
+            entry.priority = self._priority(entry.size, entry.cost)
+            return entry.value
+
+    def put(self, namespace: str, key: Hashable, value: Any, cost: float = 0.0):
+        size = estimate_size(value)
+        with self._lock:
+            self._entries[namespace][key] = _Entry(value, size, cost, self._priority(size, cost))
+        self.enforce(keep=(namespace, key))
+
+    def get_or_build(self, namespace: str, key: Hashable, builder: Callable[[], Any],
+                     keep: Optional[Callable[[], bool]] = None) -> Any:
+        """命中直接返回；未命中则构建、计量并放入缓存（构建在锁外进行）。
+        其他线程（如预热线程）正在构建同一条目时等待其完成后取缓存结果，不重复构建。
+        keep 在构建完成后调用，返回 False 时结果不放入缓存（例如构建期间数据版本已变）"""
+        while True:
+            value = self.get(namespace, key)
+            if value is not None:
+                return value
+            with self._lock:
+                building = self._building.get((namespace, key))
+                if building is None:
+                    building = self._building[(namespace, key)] = threading.Event()
+                    self.misses[namespace] += 1
+                    break
+            # 对方构建失败或结果未放入缓存时，下一轮由本线程构建
+            building.wait()
+        try:
+            start = time.perf_counter()
+            value = builder()
+            if keep is None or keep():
+                self.put(namespace, key, value, cost=time.perf_counter() - start)
+        finally:
+            with self._lock:
+                self._building.pop((namespace, key), None)
+            building.set()
+        return value
+
+    def invalidate(self, namespace: Optional[str] = None):
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(namespace, None)
+
+    def tracked_bytes(self) -> int:
+        with self._lock:
+            return sum(e.size for ns in self._entries.values() for e in ns.values())
+
+    def target_bytes(self) -> int:
+        """当前允许的缓存占用：RSS 超过告警线时为预算的一半"""
+        return self.budget // 2 if self.rss_fn() > self.rss_limit else self.budget
+
+    def enforce(self, keep: Optional[tuple] = None):
+        """缓存占用超过目标时按优先级淘汰，直到回到目标以内；keep=(命名空间, 键) 为刚放入的条目，不淘汰"""
+        with self._lock:
+            overshoot = self.tracked_bytes() - self.target_bytes()
+            if overshoot <= 0:
+                return
+            freed = 0
+            candidates = sorted(
+                ((e.priority, ns, k) for ns, entries in self._entries.items() for k, e in entries.items()
+                 if (ns, k) != keep),
+                key=lambda t: t[0],
+            )
+            for priority, ns, k in candidates:
+                if freed >= overshoot:
+                    break
+                entry = self._entries[ns].pop(k)
+                freed += entry.size
+                self._clock = max(self._clock, priority)
+                self.evictions[ns] += 1
+
+    def stats(self) -> pd.DataFrame:
+        """各命名空间的条目数、占用、命中/未命中/淘汰次数"""
+        with self._lock:
+            names = sorted(set(self._entries) | set(self.hits) | set(self.misses) | set(self.evictions))
+            rows = []
+            for ns in names:
+                entries = self._entries.get(ns, {})
+                hits, misses = self.hits[ns], self.misses[ns]
+                rows.append({
+                    "缓存": ns,
+                    "条目数": len(entries),
+                    "占用MB": round(sum(e.size for e in entries.values()) / 1024 / 1024, 2),
+                    "命中": hits,
+                    "未命中": misses,
+                    "命中率": f"{hits / (hits + misses):.0%}" if hits + misses else "-",
+                    "淘汰": self.evictions[ns],
+                })
+        return pd.DataFrame(rows, columns=["缓存", "条目数", "占用MB", "命中", "未命中", "命中率", "淘汰"])
+
+
+# ==================== 运维指标 ====================
+class OpsMetrics:
+    """运维指标：全部保存在定长环形缓冲区中，读取时只做少量统计，不影响页面刷新"""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self.process = psutil.Process(os.getpid())
+        self.process.cpu_percent(interval=None)  # 首次调用只建立基准
+        self.started = time.time()
+        self._latency: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.window))
+        self._loads: deque = deque(maxlen=20)
+        self._lock = threading.Lock()
+
+    def record_latency(self, name: str, seconds: float):
+        with self._lock:
+            self._latency[name].append(seconds)
+
+    def record_load(self, version: Hashable, seconds: float):
+        with self._lock:
+            self._loads.append((version, time.time(), seconds))
+
+    def last_load(self) -> Optional[tuple]:
+        """最近一次数据加载：(数据版本, 加载时刻, 耗时秒)"""
+        with self._lock:
+            return self._loads[-1] if self._loads else None
+
+    def process_stats(self) -> Dict[str, float]:
+        with self.process.oneshot():
+            return {
+                "rss_mb": self.process.memory_info().rss / 1024 / 1024,
+                "cpu_percent": self.process.cpu_percent(interval=None),
+                "threads": self.process.num_threads(),
+                "uptime_s": time.time() - self.started,
+            }
+
+    def latency_table(self) -> pd.DataFrame:
+        """各图表最近若干次刷新的耗时分位数（毫秒）"""
+        with self._lock:
+            samples = {k: list(v) for k, v in self._latency.items() if v}
+        rows = []
+        for name, vals in sorted(samples.items()):
+            arr = np.array(vals) * 1000
+            rows.append({
+                "名称": name,
+                "样本数": len(arr),
+                "p50(ms)": round(float(np.percentile(arr, 50)), 1),
+                "p95(ms)": round(float(np.percentile(arr, 95)), 1),
+                "最大(ms)": round(float(arr.max()), 1),
+            })
+        return pd.DataFrame(rows, columns=["名称", "样本数", "p50(ms)", "p95(ms)", "最大(ms)"])
+
+
+# ==================== 缓存预热 ====================
+class WarmupWorker:
+    """数据版本变化时在线程池中预热缓存；预热过程中版本再次变化则取消旧批次。
+    任务列表也在线程池中生成，可以在写入线程的提交回调中直接调用 submit"""
+
+    def __init__(self, max_workers: int = 2):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jineng-warmup")
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._futures: List = []
+        self._starter = None
+        self.version: Optional[Hashable] = None
+        self.total = 0
+        self.done = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def submit(self, version: Hashable, make_tasks: Callable[[], List[Callable[[], Any]]]) -> bool:
+        """版本未变时直接返回 False；否则取消未开始的旧任务，在线程池中生成并提交新一批（不等待）"""
+        with self._lock:
+            if version == self.version:
+                return False
+            self._generation += 1
+            generation = self._generation
+            if self._starter is not None:
+                self._starter.cancel()
+            self.cancelled += sum(1 for f in self._futures if f.cancel())
+            self._futures = []
+            self.version = version
+            self.total = self.done = self.failed = 0
+            self.started, self.finished = time.time(), None
+            self._starter = self._pool.submit(self._start, generation, make_tasks)
+        return True
+
+    def _start(self, generation: int, make_tasks: Callable[[], List[Callable[[], Any]]]):
+        if generation != self._generation:
+            return
+        try:
+            tasks = make_tasks()
+        except Exception:
+            tasks = None
+        with self._lock:
+            if generation != self._generation:
+                return
+            if tasks is None:
+                self.failed += 1
+                tasks = []
+            self.total = len(tasks)
+            if not tasks:
+                self.finished = time.time()
+            self._futures = [self._pool.submit(self._run, generation, t) for t in tasks]
+
+    def is_current(self, version: Hashable) -> bool:
+        """version 是否仍是最新一批预热的版本；已开始的旧任务据此提前结束"""
+        with self._lock:
+            return version == self.version
+
+    def _run(self, generation: int, task: Callable[[], Any]):
+        if generation != self._generation:
+            return
+        ok = True
+        try:
+            task()
+        except Exception:
+            ok = False
+        with self._lock:
+            if generation != self._generation:
+                return
+            self.done += 1
+            self.failed += 0 if ok else 1
+            if self.done == self.total:
+                self.finished = time.time()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "version": self.version,
+                "total": self.total,
+                "done": self.done,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "running": self.finished is None and self.started is not None,
+                "elapsed_s": ((self.finished or time.time()) - self.started) if self.started else 0.0,
+            }
@@ -0,0 +1,527 @@
+"""图表构建函数：只依赖 pandas/plotly，大屏、预热与离线导出共用"""
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# 全局配色池（多颜色，区分不同时间点）
+COLOR_POOL = [
+    "#FF3333", "#33FF33", "#3333FF", "#FFAA00", "#9933FF",
+    "#00FFFF", "#FF99CC", "#FFFF33", "#008080", "#FF00FF",
+    "#8B4513", "#20B2AA", "#FF6347", "#9370DB", "#32CD32"
+]
+
+# ==================== 图表公共函数 ====================
+SCORE_DIMENSIONS = ["自评分数", "互评分数", "双维度对比"]
+
+def get_score_cols(score_dimension: str) -> Tuple[str, str]:
+    if score_dimension == "自评分数":
+        return "自评值", "自评分数"
+    elif score_dimension == "互评分数":
+        return "互评值", "互评分数"
+    else:
+        return "自评值", "互评值"
+
+# ==================== 聚合函数（大屏、导出与接口共用） ====================
+def score_totals(df0: pd.DataFrame, by: str = "员工") -> pd.DataFrame:
+    """按员工或任务汇总自评/互评总分"""
+    return df0.groupby(by).agg({"自评值":"sum","互评值":"sum"}).reset_index()
+
+def cell_totals(df0: pd.DataFrame) -> pd.DataFrame:
+    """按 任务×员工 汇总自评/互评分（堆叠图与热力图共用）"""
+    return df0.groupby(["明细", "员工"])[["自评值", "互评值"]].sum().reset_index()
+
+def heat_matrix(df0: pd.DataFrame, cells: Optional[pd.DataFrame] = None) -> Tuple[List[str], List[str], pd.DataFrame, pd.DataFrame]:
+    """任务×员工 透视矩阵：返回 (任务列表, 员工列表, 自评矩阵, 互评矩阵)，缺失格填 0。
+    cells 为已算好的 cell_totals(df0)"""
+    task_list = df0["明细"].dropna().unique().tolist()
+    user_list = df0["员工"].dropna().unique().tolist()
+    cells = (cell_totals(df0) if cells is None else cells).set_index(["明细", "员工"])
+    pivot_self = cells["自评值"].unstack(fill_value=0)
+    pivot_peer = cells["互评值"].unstack(fill_value=0)
+    pivot_self = pivot_self.reindex(index=task_list, columns=user_list, fill_value=0)
+    pivot_peer = pivot_peer.reindex(index=task_list, columns=user_list, fill_value=0)
+    return task_list, user_list, pivot_self, pivot_peer
+
+# ==================== 大规模展示模式 ====================
+# 人数很多时逐人画柱既慢又看不清，以下模式的图表数据量与人数无关：
+# 前N名/后N名 最多 2N+1 根柱，分布 固定分箱数，分组汇总 每个分组一根柱
+DISPLAY_MODES = ["全部", "前N名/后N名", "分布", "分组汇总"]
+TOP_N = 15
+HIST_BINS = 20
+PERCENTILES = [10, 25, 50, 75, 90]
+MAX_FULL_BARS = 100  # 超过该人数时默认改用 前N名/后N名
+
+def default_display_mode(df0: pd.DataFrame) -> str:
+    n = df0["员工"].nunique() if "员工" in df0.columns else 0
+    return DISPLAY_MODES[0] if n <= MAX_FULL_BARS else DISPLAY_MODES[1]
+
+def rank_slice(agg: pd.DataFrame, by: str, col: str, n: int = TOP_N) -> pd.DataFrame:
+    """按 col 取前 n 名与后 n 名，中间部分汇总为一行“其余”（均值），按 col 从高到低排列"""
+    if len(agg) <= 2 * n + 1:
+        return agg.sort_values(col, ascending=False).reset_index(drop=True)
+    top = agg.nlargest(n, col)
+    bottom = agg.drop(top.index).nsmallest(n, col).iloc[::-1]
+    rest = agg.drop(top.index.union(bottom.index))
+    rest_row = rest[["自评值", "互评值"]].mean().round(1).to_frame().T
+    rest_row[by] = f"其余 {len(rest)} 项（均值）"
+    return pd.concat([top, rest_row, bottom], ignore_index=True)[[by, "自评值", "互评值"]]
+
+def group_summary(df0: pd.DataFrame) -> pd.DataFrame:
+    """按分组汇总人数与自评/互评总分，自评值/互评值列为人均分（各组人数不同，人均才可比）"""
+    if "分组" not in df0.columns:
+        return pd.DataFrame(columns=["分组", "人数", "自评总分", "互评总分", "自评值", "互评值"])
+    out = df0.groupby("分组").agg(人数=("员工", "nunique"), 自评总分=("自评值", "sum"), 互评总分=("互评值", "sum")).reset_index()
+    out["自评值"] = (out["自评总分"] / out["人数"]).round(1)
+    out["互评值"] = (out["互评总分"] / out["人数"]).round(1)
+    return out
+
+def score_histogram(agg: pd.DataFrame, cols: List[str], bins: int = HIST_BINS) -> Tuple[np.ndarray, pd.DataFrame]:
+    """各分数列共用同一组分箱：返回 (分箱边界, 各分箱计数表)"""
+    edges = np.histogram_bin_edges(agg[cols].to_numpy(dtype=float), bins=bins)
+    counts = pd.DataFrame({c: np.histogram(agg[c].to_numpy(dtype=float), bins=edges)[0] for c in cols})
+    return edges, counts
+
+def chart_distribution(agg: pd.DataFrame, series: List[Tuple[str, str, str]], title: str, unit: str = "人数"):
+    """总分分布直方图 + 百分位带（P25-P75 阴影，P50 实线，P10/P90 虚线）。
+    series：[(分数列, 图例名, 颜色)]"""
+    cols = [c for c, _, _ in series]
+    edges, counts = score_histogram(agg, cols)
+    centers = (edges[:-1] + edges[1:]) / 2
+    width = float(edges[1] - edges[0]) if len(edges) > 1 else 1.0
+    quantiles = agg[cols].quantile([p / 100 for p in PERCENTILES])
+
+    fig = go.Figure()
+    for col, name, color in series:
+        fig.add_trace(go.Bar(
+            x=centers, y=counts[col], width=width * (0.9 if len(series) == 1 else 0.45),
+            name=name, marker_color=color, opacity=0.85,
+            customdata=np.stack([edges[:-1], edges[1:]], axis=1),
+            hovertemplate="%{customdata[0]:.1f} ~ %{customdata[1]:.1f}：%{y}<extra>" + name + "</extra>"
+        ))
+        q = quantiles[col].tolist()
+        fig.add_vrect(x0=q[1], x1=q[3], fillcolor=color, opacity=0.12, line_width=0)
+        fig.add_vline(x=q[2], line_color=color, line_width=2,
+                      annotation_text=f"{name} P50={q[2]:.1f}", annotation_position="top")
+        for v in (q[0], q[4]):
+            fig.add_vline(x=v, line_color=color, line_width=1, line_dash="dash")
+    fig.update_layout(
+        title=f"{title}（共 {len(agg)} 项）",
+        template="plotly_dark",
+        barmode="group" if len(series) > 1 else "overlay",
+        xaxis_title="总分",
+        yaxis_title=unit,
+        legend=dict(orientation="h", y=-0.2)
+    )
+    return fig
+
+# 以下图表函数的 totals / cells / matrix 参数为已算好的聚合结果（离线导出时各分数维度共用），缺省时现算
+# 1. 人员排名柱状图
+def chart_total(df0: pd.DataFrame, score_dimension: str = "双维度对比", mode: str = "全部", n: int = TOP_N,
+                totals: Optional[pd.DataFrame] = None):
+    """totals：score_totals(df0, "员工")"""
+    if df0.empty:
+        return go.Figure()
+    s1, s2 = get_score_cols(score_dimension)
+    dual = score_dimension == "双维度对比"
+    if totals is None and mode != "分组汇总":
+        totals = score_totals(df0, "员工")
+    if mode == "分布":
+        series = [("自评值", "自评", "#4cc9f0"), ("互评值", "互评", "#f72585")] if dual else [(s1, s2, "#636efa")]
+        return chart_distribution(totals, series, "员工总分分布")
+
+    if mode == "分组汇总":
+        emp_stats, x_col, y_title = group_summary(df0), "分组", "人均总分"
+    else:
+        emp_stats, x_col, y_title = totals, "员工", "总分"
+        if mode == "前N名/后N名":
+            emp_stats = rank_slice(emp_stats, "员工", s1, n)
+        else:
+            emp_stats = emp_stats.sort_values(s1, ascending=False)
+    fig = go.Figure()
+    if dual:
+        fig.add_trace(go.Bar(x=emp_stats[x_col], y=emp_stats["自评值"], name="自评", marker_color="#4cc9f0"))
+        fig.add_trace(go.Bar(x=emp_stats[x_col], y=emp_stats["互评值"], name="互评", marker_color="#f72585"))
+        fig.update_layout(barmode="group", xaxis_title=x_col, yaxis_title=y_title)
+    else:
+        fig.add_trace(go.Bar(x=emp_stats[x_col], y=emp_stats[s1], name=s2))
+        fig.update_layout(xaxis_title=x_col, yaxis_title=s2 if x_col == "员工" else f"人均{s2}")
+    fig.update_layout(template="plotly_dark", legend=dict(orientation="h", y=-0.2))
+    return fig
+
+# 2. 任务对比堆叠柱状图
+def chart_stack(df0: pd.DataFrame, score_dimension: str = "双维度对比", cells: Optional[pd.DataFrame] = None):
+    """cells：cell_totals(df0)"""
+    if df0.empty:
+        return go.Figure()
+    fig = go.Figure()
+    agg_df = cell_totals(df0) if cells is None else cells
+
+    if score_dimension == "双维度对比":
+        for emp in agg_df["员工"].unique():
+            sub = agg_df[agg_df["员工"] == emp]
+            fig.add_trace(go.Bar(x=sub["明细"], y=sub["互评值"], name=f"互评-{emp}", marker_color="#f72585", opacity=0.7))
+            fig.add_trace(go.Bar(x=sub["明细"], y=sub["自评值"], name=f"自评-{emp}", marker_color="#4cc9f0", opacity=0.8))
+    else:
+        col, name_text = get_score_cols(score_dimension)
+        for emp in agg_df["员工"].unique():
+            sub = agg_df[agg_df["员工"] == emp]
+            fig.add_trace(go.Bar(x=sub["明细"], y=sub[col], name=emp))
+
+    fig.update_layout(
+        barmode="stack",
+        template="plotly_dark",
+        xaxis_title="任务",
+        yaxis_title="分数",
+        legend=dict(orientation="h", y=-0.2)
+    )
+    return fig
+
+# ===================== 热力图函数（已改为白底+深色文字） =====================
+def chart_heat(df0: pd.DataFrame, score_dimension: str = "双维度对比", matrix: Optional[tuple] = None):
+    """matrix：heat_matrix(df0) 的结果"""
+    # 全局空数据拦截
+    if df0.empty:
+        return {
+            "title": {"text": "暂无有效数据", "left": "center", "textStyle": {"color": "#333333"}},
+            "backgroundColor": "#ffffff"
+        }
+
+    # 提取维度并去重、清洗
+    task_list = df0["明细"].dropna().unique().tolist()
+    user_list = df0["员工"].dropna().unique().tolist()
+
+    # 维度为空拦截
+    if len(task_list) == 0 or len(user_list) == 0:
+        return {
+            "title": {"text": "任务/人员数据为空，无法生成热力图", "left": "center", "textStyle": {"color": "#333333"}},
+            "backgroundColor": "#ffffff"
+        }
+
+    # 数据透视聚合，强制填充0，规避索引异常
+    try:
+        task_list, user_list, pivot_self, pivot_peer = matrix if matrix is not None else heat_matrix(df0)
+    except Exception:
+        return {
+            "title": {"text": "数据格式异常，生成失败", "left": "center", "textStyle": {"color": "#333333"}},
+            "backgroundColor": "#ffffff"
+        }
+
+    data = []
+    title_text = ""
+    color_list = []
+    min_val = 0
+    max_val = 0
+
+    # 分支1：自评分数
+    if score_dimension == "自评分数":
+        title_text = "自评分数 热力图"
+        color_list = ["#e8f4f8", "#4cc9f0"]
+        all_vals = []
+        for y_idx, task in enumerate(task_list):
+            for x_idx, user in enumerate(user_list):
+                val = float(pivot_self.loc[task, user]) if task in pivot_self.index and user in pivot_self.columns else 0
+                data.append([x_idx, y_idx, val])
+                all_vals.append(val)
+        min_val = min(all_vals) if all_vals else 0
+        max_val = max(all_vals) if all_vals else 0
+
+    # 分支2：互评分数
+    elif score_dimension == "互评分数":
+        title_text = "互评分数 热力图"
+        color_list = ["#fff0f3", "#f72585"]
+        all_vals = []
+        for y_idx, task in enumerate(task_list):
+            for x_idx, user in enumerate(user_list):
+                val = float(pivot_peer.loc[task, user]) if task in pivot_peer.index and user in pivot_peer.columns else 0
+                data.append([x_idx, y_idx, val])
+                all_vals.append(val)
+        min_val = min(all_vals) if all_vals else 0
+        max_val = max(all_vals) if all_vals else 0
+
+    # 分支3：双维度差值
+    else:
+        title_text = "自评-互评 分数差值热力图"
+        color_list = ["#f72585", "#ffffff", "#4cc9f0"]
+        all_diff = []
+        for y_idx, task in enumerate(task_list):
+            for x_idx, user in enumerate(user_list):
+                s = float(pivot_self.loc[task, user]) if task in pivot_self.index and user in pivot_self.columns else 0
+                p = float(pivot_peer.loc[task, user]) if task in pivot_peer.index and user in pivot_peer.columns else 0
+                diff = round(s - p, 1)
+                data.append([x_idx, y_idx, diff])
+                all_diff.append(diff)
+        min_val = min(all_diff) if all_diff else -1
+        max_val = max(all_diff) if all_diff else 1
+
+    # 兜底极值
+    if min_val == max_val:
+        min_val -= 1
+        max_val += 1
+
+    # ECharts 配置：白底 + 深色文字/坐标轴
+    option = {
+        "backgroundColor": "#ffffff",
+        "title": {
+            "text": title_text,
+            "left": "center",
+            "textStyle": {"color": "#333333", "fontSize": 16}
+        },
+        "tooltip": {
+            "trigger": "item",
+            "formatter": "人员：{b}<br/>任务：{a}<br/>数值：{c}"
+        },
+        "grid": {"left": "3%", "right": "3%", "top": "12%", "bottom": "18%", "containLabel": True},
+        "xAxis": {
+            "type": "category",
+            "data": user_list,
+            "axisLabel": {"color": "#333333", "rotate": 45, "fontSize": 11},
+            "axisLine": {"lineStyle": {"color": "#999999"}}
+        },
+        "yAxis": {
+            "type": "category",
+            "data": task_list,
+            "axisLabel": {"color": "#333333", "fontSize": 11},
+            "axisLine": {"lineStyle": {"color": "#999999"}}
+        },
+        "visualMap": {
+            "min": min_val,
+            "max": max_val,
+            "show": True,
+            "orient": "horizontal",
+            "left": "center",
+            "bottom": "8%",
+            "inRange": {"color": color_list},
+            "textStyle": {"color": "#333333"}
+        },
+        "series": [{
+            "name": "分数",
+            "type": "heatmap",
+            "data": data,
+            "label": {"show": True, "color": "#000000", "fontSize": 10},
+            "itemStyle": {"borderColor": "#eeeeee", "borderWidth": 1},
+            "emphasis": {"itemStyle": {"shadowBlur": 8}}
+        }]
+    }
+    return option
+
+# ===================== 子弹图 =====================
+BULLET_SERIES = [("自评值", "自评分数", "#ff7f0e"), ("互评值", "互评分数", "#4cc9f0")]
+
+def bullet_rows(df0: pd.DataFrame, dim: str, mode: str, n: int, rank_col: str,
+                totals: Optional[pd.DataFrame] = None) -> Tuple[pd.DataFrame, str]:
+    """子弹图的行：全部 / 前N名+其余+后N名（高分在上）/ 各分组人均；返回 (数据, 类别列)"""
+    if mode == "分组汇总":
+        return group_summary(df0), "分组"
+    agg = score_totals(df0, dim) if totals is None else totals
+    if mode == "前N名/后N名":
+        # 横向条形图自下而上绘制，反转后高分在上
+        agg = rank_slice(agg, dim, rank_col, n).iloc[::-1].reset_index(drop=True)
+    return agg, dim
+
+def chart_bullet_base(df0: pd.DataFrame, dim: str = "员工", mode: str = "全部", n: int = TOP_N,
+                      totals: Optional[pd.DataFrame] = None):
+    """totals：score_totals(df0, dim)"""
+    if df0.empty:
+        return go.Figure()
+    name = "员工" if dim == "员工" else "任务"
+    if mode == "分布":
+        return chart_distribution(score_totals(df0, dim) if totals is None else totals, BULLET_SERIES,
+                                  f"{name}自评/互评总分分布", "人数" if dim == "员工" else "任务数")
+    agg, cat_col = bullet_rows(df0, dim, mode, n, "自评值", totals)
+    title = f"{name}自评/互评对比" if cat_col == dim else "分组人均自评/互评对比"
+
+    fig = go.Figure()
+    # 底层：自评（正常宽度）
+    fig.add_trace(go.Bar(
+        y=agg[cat_col],
+        x=agg["自评值"],
+        orientation="h",
+        name="自评分数",
+        marker_color="#ff7f0e",
+        opacity=1.0,
+        width=0.6
+    ))
+    # 上层：互评（宽度收窄、上浮、透明度60%）
+    fig.add_trace(go.Bar(
+        y=agg[cat_col],
+        x=agg["互评值"],
+        orientation="h",
+        name="互评分数",
+        marker_color="#4cc9f0",
+        opacity=0.8,
+        width=0.4
+    ))
+
+    fig.update_layout(
+        title=title,
+        template="plotly_dark",
+        height=max(400, len(agg)*40),
+        legend=dict(orientation="h", y=-0.15, x=0.5, xanchor="center"),
+        barmode="overlay",
+        xaxis=dict(title="分数", showgrid=True, gridcolor="#444"),
+        yaxis=dict(title=cat_col, showgrid=False),
+        margin=dict(l=10, r=10, t=40, b=60)
+    )
+    return fig
+
+def chart_bullet_advanced(df0: pd.DataFrame, dim: str = "员工", mode: str = "全部", n: int = TOP_N,
+                          totals: Optional[pd.DataFrame] = None):
+    """totals：score_totals(df0, dim)"""
+    if df0.empty:
+        return go.Figure()
+    name = "员工" if dim == "员工" else "任务"
+    if mode == "分布":
+        return chart_distribution(score_totals(df0, dim) if totals is None else totals, BULLET_SERIES,
+                                  f"【高级版】{name}自评&互评总分分布", "人数" if dim == "员工" else "任务数")
+    agg_df, cat_col = bullet_rows(df0, dim, mode, n, "互评值", totals)
+    title = f"【高级版】{name}自评&互评分数对比" if cat_col == dim else "【高级版】分组人均自评&互评分数对比"
+
+    if mode != "前N名/后N名":
+        agg_df = agg_df.sort_values("互评值", ascending=True).reset_index(drop=True)
+    all_max = max(agg_df["自评值"].max(), agg_df["互评值"].max()) * 1.2
+
+    fig = go.Figure()
+    # 底层：自评
+    fig.add_trace(go.Bar(
+        y=agg_df[cat_col],
+        x=agg_df["自评值"],
+        orientation="h",
+        marker_color="#ff7f0e",
+        name="自评分数",
+        opacity=1.0,
+        width=0.6
+    ))
+    # 上层：互评（窄宽度+透明度60%）
+    fig.add_trace(go.Bar(
+        y=agg_df[cat_col],
+        x=agg_df["互评值"],
+        orientation="h",
+        marker_color="#4cc9f0",
+        name="互评分数",
+        opacity=0.8,
+        width=0.4
+    ))
+
+    fig.update_layout(
+        title=title,
+        template="plotly_dark",
+        height=max(450, len(agg_df)*42),
+        xaxis=dict(range=[0, all_max], title="分数", gridcolor="#444"),
+        yaxis=dict(title=cat_col),
+        legend=dict(orientation="h", y=-0.18, xanchor="center", x=0.5),
+        barmode="overlay",
+        margin=dict(l=10, r=10, t=40, b=65)
+    )
+    return fig
+
+# ===================== 能力分析 =====================
+def chart_ability(df0: pd.DataFrame, selected_emps: List[str], score_dimension: str = "双维度对比",
+                  sheet_dfs: Optional[List[Tuple[str, pd.DataFrame]]] = None):
+    """sheet_dfs：按时间点拆分的 (时间点, 数据) 列表，每个时间点画一组曲线"""
+    if df0.empty:
+        return go.Figure(), go.Figure(), go.Figure()
+    tasks = df0["明细"].unique().tolist()
+    fig1, fig2, fig3 = go.Figure(), go.Figure(), go.Figure()
+
+    for idx, (sheet, df_sheet) in enumerate(sheet_dfs or []):
+        color = COLOR_POOL[idx % len(COLOR_POOL)]
+        if df_sheet.empty:
+            continue
+        pivot_self = df_sheet.pivot_table(index="明细", columns="员工", values="自评值", aggfunc="sum", fill_value=0)
+        pivot_peer = df_sheet.pivot_table(index="明细", columns="员工", values="互评值", aggfunc="sum", fill_value=0)
+
+        # 根据分数维度动态渲染曲线
+        for emp in selected_emps:
+            # 仅自评
+            if score_dimension == "自评分数":
+                if emp in pivot_self.columns:
+                    fig1.add_trace(go.Scatter(
+                        x=tasks, y=pivot_self[emp].reindex(tasks, fill_value=0),
+                        mode="lines+markers", name=f"{sheet}-{emp}",
+                        line=dict(color=color, width=3), marker=dict(size=7)
+                    ))
+            # 仅互评
+            elif score_dimension == "互评分数":
+                if emp in pivot_peer.columns:
+                    fig1.add_trace(go.Scatter(
+                        x=tasks, y=pivot_peer[emp].reindex(tasks, fill_value=0),
+                        mode="lines+markers", name=f"{sheet}-{emp}",
+                        line=dict(color=color, width=3), marker=dict(size=7)
+                    ))
+            # 双维度
+            else:
+                if emp in pivot_self.columns:
+                    fig1.add_trace(go.Scatter(
+                        x=tasks, y=pivot_self[emp].reindex(tasks, fill_value=0),
+                        mode="lines+markers", name=f"{sheet}-{emp}(自评)",
+                        line=dict(color=color, width=3), marker=dict(size=7)
+                    ))
+                if emp in pivot_peer.columns:
+                    fig1.add_trace(go.Scatter(
+                        x=tasks, y=pivot_peer[emp].reindex(tasks, fill_value=0),
+                        mode="lines+markers", name=f"{sheet}-{emp}(互评)",
+                        line=dict(color=color, width=3, dash="dash"), marker=dict(size=7)
+                    ))
+
+        # 任务汇总曲线
+        if score_dimension == "自评分数":
+            sum_data = pivot_self.sum(axis=1).reindex(tasks, fill_value=0)
+            fig2.add_trace(go.Scatter(
+                x=tasks, y=sum_data, mode="lines+markers",
+                name=f"{sheet}", line=dict(color=color, width=3)
+            ))
+        elif score_dimension == "互评分数":
+            sum_data = pivot_peer.sum(axis=1).reindex(tasks, fill_value=0)
+            fig2.add_trace(go.Scatter(
+                x=tasks, y=sum_data, mode="lines+markers",
+                name=f"{sheet}", line=dict(color=color, width=3)
+            ))
+        else:
+            sum_self = pivot_self.sum(axis=1).reindex(tasks, fill_value=0)
+            sum_peer = pivot_peer.sum(axis=1).reindex(tasks, fill_value=0)
+            fig2.add_trace(go.Scatter(
+                x=tasks, y=sum_self, mode="lines+markers",
+                name=f"{sheet}(自评)", line=dict(color=color, width=3)
+            ))
+            fig2.add_trace(go.Scatter(
+                x=tasks, y=sum_peer, mode="lines+markers",
+                name=f"{sheet}(互评)", line=dict(color=color, width=3, dash="dash")
+            ))
+
+        # 员工总分曲线
+        if score_dimension == "自评分数":
+            emp_sum = pivot_self.sum(axis=0)
+            fig3.add_trace(go.Scatter(
+                x=emp_sum.index, y=emp_sum.values, mode="lines+markers",
+                name=f"{sheet}", line=dict(color=color, width=3)
+            ))
+        elif score_dimension == "互评分数":
+            emp_sum = pivot_peer.sum(axis=0)
+            fig3.add_trace(go.Scatter(
+                x=emp_sum.index, y=emp_sum.values, mode="lines+markers",
+                name=f"{sheet}", line=dict(color=color, width=3)
+            ))
+        else:
+            emp_sum_self = pivot_self.sum(axis=0)
+            emp_sum_peer = pivot_peer.sum(axis=0)
+            fig3.add_trace(go.Scatter(
+                x=emp_sum_self.index, y=emp_sum_self.values, mode="lines+markers",
+                name=f"{sheet}(自评)", line=dict(color=color, width=3)
+            ))
+            fig3.add_trace(go.Scatter(
+                x=emp_sum_peer.index, y=emp_sum_peer.values, mode="lines+markers",
+                name=f"{sheet}(互评)", line=dict(color=color, width=3, dash="dash")
+            ))
+
+    # 统一布局
+    title_map = {
+        "自评分数": "员工任务完成曲线（自评）",
+        "互评分数": "员工任务完成曲线（互评）",
+        "双维度对比": "员工任务完成曲线（双维度）"
+    }
+    fig1.update_layout(title=title_map[score_dimension], template="plotly_dark", legend=dict(orientation="h", y=-0.25))
+    fig2.update_layout(title="任务整体趋势", template="plotly_dark", legend=dict(orientation="h", y=-0.25))
+    fig3.update_layout(title="员工总分对比", template="plotly_dark", legend=dict(orientation="h", y=-0.25))
+    return fig1, fig2, fig3
@@ -0,0 +1,224 @@
+"""离线批量导出：按 时间点 × 分组 × 分数维度 生成自包含 HTML 报告，不依赖 Streamlit
+
+用法：
+    python jineng_report.py --file jixiao.xlsx --out reports
+    python jineng_report.py --periods 2025_10 2025_12 --groups A8 B7 --dimensions 自评分数 --workers 8
+"""
+import argparse
+import html
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+from jineng_charts import (
+    SCORE_DIMENSIONS, cell_totals, chart_ability, chart_bullet_advanced, chart_bullet_base, chart_heat,
+    chart_stack, chart_total, default_display_mode, heat_matrix, score_totals,
+)
+from jineng_store import ShardedPeriods
+
+ALL_GROUPS = "全部分组"
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+{script}
+<style>
+body{{background-color:#e6f7ff;color:#003366;font-family:sans-serif;margin:24px;}}
+.chart{{background-color:#ffffff;border-radius:16px;box-shadow:0 0 15px rgba(0,0,0,0.08);padding:12px;margin:16px 0;}}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+{body}
+</body>
+</html>
+"""
+
+# 子进程共享的时间点数据与预聚合结果：进程池初始化时注入一次，任务只传时间点/分组/维度
+_FRAMES: Optional[ShardedPeriods] = None
+_AGGREGATES: Dict[Tuple[str, str], Dict[str, Any]] = {}
+_PLOTLY_JS: Optional[str] = None
+
+
+def _init_worker(frames: ShardedPeriods, aggregates: Dict[Tuple[str, str], Dict[str, Any]]):
+    global _FRAMES, _AGGREGATES
+    _FRAMES = frames
+    _AGGREGATES = aggregates
+
+
+def _plotly_script(mode: str) -> str:
+    global _PLOTLY_JS
+    if mode == "cdn":
+        # plotly-latest 已停在 1.x，必须引用与本机 plotly 配套的版本
+        return f'<script src="https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js" charset="utf-8"></script>'
+    if _PLOTLY_JS is None:
+        _PLOTLY_JS = get_plotlyjs()
+    return f'<script type="text/javascript">{_PLOTLY_JS}</script>'
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", str(name)) or "_"
+
+
+# ==================== 图表转换 ====================
+def heat_figure(option: dict) -> go.Figure:
+    """把 chart_heat 的 ECharts 配置转成 plotly 热力图，报告只需内嵌一份 plotly.js"""
+    fig = go.Figure()
+    title = option.get("title", {}).get("text", "")
+    if not option.get("series"):
+        fig.update_layout(title=title, template="plotly_white")
+        return fig
+    users = option["xAxis"]["data"]
+    tasks = option["yAxis"]["data"]
+    z = [[0.0] * len(users) for _ in tasks]
+    for x, y, v in option["series"][0]["data"]:
+        z[y][x] = v
+    colors = option["visualMap"]["inRange"]["color"]
+    fig.add_trace(go.Heatmap(
+        x=users, y=tasks, z=z,
+        zmin=option["visualMap"]["min"], zmax=option["visualMap"]["max"],
+        colorscale=[[i / (len(colors) - 1), c] for i, c in enumerate(colors)],
+        text=z, texttemplate="%{text}", xgap=1, ygap=1
+    ))
+    fig.update_layout(title=title, template="plotly_white", height=max(600, len(tasks) * 28),
+                      xaxis=dict(tickangle=45), yaxis=dict(autorange="reversed"))
+    return fig
+
+
+def aggregate(df0) -> Dict[str, Any]:
+    """同一 时间点/分组 在各分数维度间共用的聚合：员工/任务总分、任务×员工汇总及热力矩阵"""
+    if df0.empty:
+        return {}
+    cells = cell_totals(df0)
+    return {"员工": score_totals(df0, "员工"), "明细": score_totals(df0, "明细"),
+            "cells": cells, "matrix": heat_matrix(df0, cells)}
+
+
+def report_figures(df0, period: str, dimension: str,
+                   aggs: Optional[Dict[str, Any]] = None) -> List[Tuple[str, go.Figure]]:
+    """单个 时间点/分组/维度 的全部图表，与大屏各视图一一对应（排名/子弹图使用大屏的默认展示方式）。
+    aggs 为 aggregate(df0) 的结果，缺省时各图表自行聚合"""
+    aggs = aggs or {}
+    emps = df0["员工"].unique().tolist() if "员工" in df0.columns else []
+    mode = default_display_mode(df0)
+    f1, f2, f3 = chart_ability(df0, emps, dimension, sheet_dfs=[(period, df0)])
+    return [
+        ("人员完成任务数量排名", chart_total(df0, dimension, mode, totals=aggs.get("员工"))),
+        ("任务对比（堆叠柱状图）", chart_stack(df0, dimension, cells=aggs.get("cells"))),
+        ("任务-人员热力图", heat_figure(chart_heat(df0, dimension, matrix=aggs.get("matrix")))),
+        ("基础子弹图（员工维度）", chart_bullet_base(df0, "员工", mode, totals=aggs.get("员工"))),
+        ("基础子弹图（任务维度）", chart_bullet_base(df0, "明细", mode, totals=aggs.get("明细"))),
+        ("高级子弹图（员工维度）", chart_bullet_advanced(df0, "员工", mode, totals=aggs.get("员工"))),
+        ("高级子弹图（任务维度）", chart_bullet_advanced(df0, "明细", mode, totals=aggs.get("明细"))),
+        ("能力分析：员工任务完成曲线", f1),
+        ("能力分析：任务整体趋势", f2),
+        ("能力分析：员工总分对比", f3),
+    ]
+
+
+def write_report(path: str, title: str, figures: List[Tuple[str, go.Figure]], plotlyjs: str = "inline"):
+    body = "\n".join(
+        f'<div class="chart"><h2>{html.escape(name)}</h2>{pio.to_html(fig, full_html=False, include_plotlyjs=False)}</div>'
+        for name, fig in figures
+    )
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(PAGE_TEMPLATE.format(title=html.escape(title), script=_plotly_script(plotlyjs), body=body))
+
+
+# ==================== 批量任务 ====================
+def render_job(job: Tuple[str, str, str, str, str]) -> Tuple[str, int, float]:
+    """子进程入口：返回 (文件路径, 图表数, 耗时秒)"""
+    period, group, dimension, path, plotlyjs = job
+    start = time.perf_counter()
+    df0 = _FRAMES.select(period, [] if group == ALL_GROUPS else [group])
+    figures = report_figures(df0, period, dimension, _AGGREGATES.get((period, group)))
+    write_report(path, f"{period} · {group} · {dimension}", figures, plotlyjs)
+    return path, len(figures), time.perf_counter() - start
+
+
+def build_jobs(periods: List[str], groups: List[str], dimensions: List[str], out_dir: str,
+               plotlyjs: str) -> List[Tuple[str, str, str, str, str]]:
+    return [
+        (p, g, d, os.path.join(out_dir, _safe_name(p), _safe_name(g), f"{_safe_name(d)}.html"), plotlyjs)
+        for p in periods for g in groups for d in dimensions
+    ]
+
+
+def write_index(out_dir: str, results: List[Tuple[str, str, str, str, str]]):
+    rows = "\n".join(
+        f'<li><a href="{html.escape(os.path.relpath(path, out_dir))}">{html.escape(f"{p} · {g} · {d}")}</a></li>'
+        for p, g, d, path, _ in results
+    )
+    with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(PAGE_TEMPLATE.format(title="技能覆盖分析报告", script="", body=f"<ul>\n{rows}\n</ul>"))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="批量导出技能覆盖分析图表（HTML）")
+    parser.add_argument("--file", default="jixiao.xlsx", help="数据文件，默认 jixiao.xlsx")
+    parser.add_argument("--out", default="reports", help="输出目录，默认 reports")
+    parser.add_argument("--periods", nargs="*", help="时间点，默认全部")
+    parser.add_argument("--groups", nargs="*", help=f"分组，默认“{ALL_GROUPS}”加每个分组")
+    parser.add_argument("--dimensions", nargs="*", choices=SCORE_DIMENSIONS, help="分数维度，默认全部")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="进程数，1 表示不用进程池")
+    parser.add_argument("--plotlyjs", choices=["inline", "cdn"], default="inline",
+                        help="inline：每个文件内嵌 plotly.js（可离线打开）；cdn：引用在线脚本，文件更小")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    start = time.perf_counter()
+    frames = ShardedPeriods.open(args.file)
+    # 只加载所选时间点所在的分片
+    periods = args.periods or [s for s in frames.period_names() if s in frames]
+    missing = [p for p in periods if p not in frames]
+    for level, text in frames.messages:
+        print(f"[{level}] {text}", file=sys.stderr)
+    if not periods:
+        print(f"未找到可用数据：{args.file}", file=sys.stderr)
+        return 1
+    if missing:
+        print(f"时间点不存在：{', '.join(missing)}", file=sys.stderr)
+        return 1
+    groups = args.groups or [ALL_GROUPS] + frames.group_catalogue()
+    dimensions = args.dimensions or SCORE_DIMENSIONS
+
+    # 主进程一次性物化增量、建好分组分区并算好各 时间点×分组 的聚合，子进程直接复用，各分数维度不再重复聚合
+    aggregates = {}
+    for p in periods:
+        frames.partitions(p)
+        for g in groups:
+            aggregates[(p, g)] = aggregate(frames.select(p, [] if g == ALL_GROUPS else [g]))
+    jobs = build_jobs(periods, groups, dimensions, args.out, args.plotlyjs)
+    print(f"数据加载 {time.perf_counter() - start:.1f}s，共 {len(jobs)} 个报告文件")
+
+    charts = 0
+    if args.workers <= 1:
+        _init_worker(frames, aggregates)
+        for job in jobs:
+            charts += render_job(job)[1]
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(frames, aggregates)) as pool:
+            futures = [pool.submit(render_job, job) for job in jobs]
+            for i, fut in enumerate(as_completed(futures), 1):
+                path, n, secs = fut.result()
+                charts += n
+                print(f"[{i}/{len(jobs)}] {path}（{n} 张图，{secs:.1f}s）")
+    write_index(args.out, jobs)
+    print(f"完成：{len(jobs)} 个文件，{charts} 张图，总耗时 {time.perf_counter() - start:.1f}s，索引 {os.path.join(args.out, 'index.html')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,783 @@
+"""jixiao.xlsx 存储层：时间点快照 + 增量（写时复制），可按年份拆分为多个分片工作簿"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# ==================== 存储常量 ====================
+# 索引表：记录每个增量时间点继承自哪个时间点（基准为空表示完整快照）
+MANIFEST_SHEET = "_时间点索引"
+MANIFEST_COLS = ["时间点", "基准"]
+# 行主键：同一时间点内 明细+员工 唯一确定一行
+KEY_COLS = ["明细", "员工"]
+# 增量表中标记删除行的列
+DELTA_FLAG_COL = "_变更"
+DELTA_DELETE = "删除"
+# 派生列：不参与差异比较，物化时重新计算
+DERIVED_COLS = ["自评值_数量总和", "互评值_数量总和", "时间点"]
+# 增量链超过该深度，或变更行占比超过该比例时，重新存为完整快照
+REBASE_DEPTH = 6
+REBASE_RATIO = 0.5
+
+TEMPLATE_COLS = ["明细", "自评值_数量总和", "互评值_数量总和", "员工", "自评值", "互评值", "分组"]
+GROUP_COL = "分组"
+DEFAULT_GROUP = "默认分组"
+
+
+# ==================== 工具函数 ====================
+def get_excel_writer(file_path: str, mode: str = "w") -> pd.ExcelWriter:
+    if mode == "a" and os.path.exists(file_path):
+        return pd.ExcelWriter(file_path, mode="a", if_sheet_exists="replace", engine="openpyxl")
+    return pd.ExcelWriter(file_path, engine="openpyxl")
+
+@contextmanager
+def atomic_excel_writer(file_path: str, mode: str = "w"):
+    """先写同目录下的临时副本，成功后 os.replace 整体替换；出错时原文件保持不变，读取方不会看到写了一半的工作簿"""
+    folder = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp = tempfile.mkstemp(prefix=".~" + os.path.basename(file_path) + ".", suffix=".xlsx", dir=folder)
+    os.close(fd)
+    try:
+        # mkstemp 建的文件权限为 0600，替换后要与原文件保持一致
+        if os.path.exists(file_path):
+            shutil.copymode(file_path, tmp)
+        else:
+            os.chmod(tmp, 0o644)
+        if mode == "a" and os.path.exists(file_path):
+            shutil.copyfile(file_path, tmp)
+        with get_excel_writer(tmp, mode=mode if os.path.getsize(tmp) else "w") as writer:
+            yield writer
+        os.replace(tmp, file_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def frame_token(df: pd.DataFrame) -> str:
+    """数据内容指纹，用作乐观并发的版本号：编辑时记下，保存时与最新数据比对"""
+    h = hashlib.sha1(repr(list(df.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df.astype(str), index=False).values.tobytes())
+    return h.hexdigest()[:16]
+
+def calc_score_sum(df: pd.DataFrame, score_col: str) -> pd.DataFrame:
+    """统一计算单维度分数总和"""
+    if score_col not in df.columns or "明细" not in df.columns:
+        return df
+    sum_col_name = f"{score_col}_数量总和"
+    if sum_col_name in df.columns:
+        df = df.drop(columns=[sum_col_name])
+    sum_df = df.groupby("明细", as_index=False)[score_col].sum().rename(columns={score_col: sum_col_name})
+    df = df.merge(sum_df, on="明细", how="left")
+    return df
+
+def calc_all_sum(df: pd.DataFrame) -> pd.DataFrame:
+    """一次性计算自评+互评两个总和"""
+    df = calc_score_sum(df, "自评值")
+    df = calc_score_sum(df, "互评值")
+    return df
+
+# ==================== 索引表 ====================
+def read_manifest(xpd: pd.ExcelFile) -> Dict[str, str]:
+    """读取索引表，返回 {时间点: 基准时间点}，仅包含增量时间点"""
+    if MANIFEST_SHEET not in xpd.sheet_names:
+        return {}
+    mf = pd.read_excel(xpd, sheet_name=MANIFEST_SHEET, dtype=str).fillna("")
+    if not set(MANIFEST_COLS).issubset(mf.columns):
+        return {}
+    return {r["时间点"]: r["基准"] for _, r in mf.iterrows() if r["时间点"] and r["基准"]}
+
+def manifest_frame(manifest: Dict[str, str]) -> pd.DataFrame:
+    return pd.DataFrame([[k, v] for k, v in manifest.items()], columns=MANIFEST_COLS)
+
+def empty_delta(base: pd.DataFrame) -> pd.DataFrame:
+    """新时间点的空增量表（仅表头）"""
+    value_cols = [c for c in base.columns if c not in KEY_COLS and c not in DERIVED_COLS]
+    return pd.DataFrame(columns=KEY_COLS + value_cols + [DELTA_FLAG_COL])
+
+# ==================== 差异与物化 ====================
+def _value_cols(df: pd.DataFrame) -> List[str]:
+    return [c for c in df.columns if c not in KEY_COLS and c not in DERIVED_COLS and c != DELTA_FLAG_COL]
+
+def _keys_ok(df: pd.DataFrame) -> bool:
+    return set(KEY_COLS).issubset(df.columns) and not df.duplicated(KEY_COLS).any()
+
+def diff_frames(base: pd.DataFrame, target: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """计算 target 相对 base 的增量；主键重复或列结构变化时返回 None（需存完整快照）"""
+    if not _keys_ok(base) or not _keys_ok(target):
+        return None
+    value_cols = _value_cols(target)
+    if set(value_cols) != set(_value_cols(base)):
+        return None
+    b = base.set_index(KEY_COLS)[value_cols]
+    t = target.set_index(KEY_COLS)[value_cols]
+
+    in_base = t.index.isin(b.index)
+    t_common = t[in_base]
+    changed = (t_common != b.loc[t_common.index]).any(axis=1)
+    upserts = pd.concat([t_common[changed], t[~in_base]])
+    upserts[DELTA_FLAG_COL] = ""
+
+    deleted = b.index[~b.index.isin(t.index)]
+    # 删除行的取值列留空（用空串而不是 NaN，避免整数列被拼接成浮点写入工作簿）
+    deletes = pd.DataFrame("", index=deleted, columns=value_cols)
+    deletes[DELTA_FLAG_COL] = DELTA_DELETE
+
+    delta = pd.concat([upserts, deletes]).reset_index()
+    return delta[KEY_COLS + value_cols + [DELTA_FLAG_COL]]
+
+def _restore_dtypes(df: pd.DataFrame, dtypes: pd.Series) -> pd.DataFrame:
+    """把数值列恢复为基准表的类型：增量表中删除行读回为空白，叠加后整数列会变成浮点/对象列。
+    只在无损时转换，保证物化结果与数据指纹不随重新编码变化"""
+    for c, dtype in dtypes.items():
+        if c in DERIVED_COLS or c not in df.columns or df[c].dtype == dtype:
+            continue
+        if not pd.api.types.is_numeric_dtype(dtype):
+            continue
+        values = pd.to_numeric(df[c], errors="coerce")
+        if values.notna().all() and (values == values.astype(dtype)).all():
+            df[c] = values.astype(dtype)
+    return df
+
+def apply_delta(base: pd.DataFrame, delta: pd.DataFrame, name: str = "") -> pd.DataFrame:
+    """基准快照 + 增量 → 完整时间点数据（保持基准行顺序，新增行追加在末尾）"""
+    columns = list(base.columns)
+    out = base.set_index(KEY_COLS)
+    if delta.empty:
+        out = out.reset_index()
+    else:
+        flags = delta[DELTA_FLAG_COL].astype(str) if DELTA_FLAG_COL in delta.columns else pd.Series("", index=delta.index)
+        upserts = delta[flags != DELTA_DELETE].drop(columns=[DELTA_FLAG_COL], errors="ignore").set_index(KEY_COLS)
+        deletes = delta[flags == DELTA_DELETE].set_index(KEY_COLS).index
+
+        cols = [c for c in upserts.columns if c in out.columns]
+        common = upserts.index[upserts.index.isin(out.index)]
+        if len(common):
+            out.loc[common, cols] = upserts.loc[common, cols].values
+        added = upserts[~upserts.index.isin(out.index)]
+        out = pd.concat([out.drop(index=deletes, errors="ignore"), added]).reset_index()
+        columns += [c for c in out.columns if c not in columns]
+    out = out[columns]
+    if "时间点" in out.columns and name:
+        out["时间点"] = name
+    for c in ["自评值", "互评值"]:
+        if c in out.columns:
+            out[c] = pd.to_numeric(out[c], errors="coerce").fillna(0)
+    out = _restore_dtypes(out, base.dtypes)
+    return calc_all_sum(out.fillna(""))
+
+def partition_frame(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Tuple[int, int]]]:
+    """清洗后按分组稳定排序，返回 (排序后数据, {分组: (起始行, 结束行)})；
+    行索引保留原始顺序，便于多分组拼接后还原"""
+    df = df.copy()
+    if GROUP_COL not in df.columns:
+        df[GROUP_COL] = DEFAULT_GROUP
+    for c in ["自评值", "互评值"]:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0)
+    if "明细" in df.columns:
+        df = df[df["明细"].notna() & (df["明细"] != "") & (df["明细"] != "分数总和")]
+    df = df[df[GROUP_COL].notna()]
+    codes, groups = pd.factorize(df[GROUP_COL])
+    df = df.iloc[codes.argsort(kind="stable")]
+    counts = pd.Series(codes).value_counts().reindex(range(len(groups)), fill_value=0).tolist()
+    offsets, start = {}, 0
+    for g, n in zip(groups, counts):
+        offsets[g] = (start, start + n)
+        start += n
+    return df, offsets
+
+def sheet_groups(df: pd.DataFrame) -> List[str]:
+    """原始表（快照或增量）中出现的分组，与 partition_frame 的过滤规则一致；增量表只看新增/修改行"""
+    if DELTA_FLAG_COL in df.columns:
+        df = df[df[DELTA_FLAG_COL].astype(str) != DELTA_DELETE]
+    if GROUP_COL not in df.columns:
+        return [DEFAULT_GROUP] if len(df) else []
+    if "明细" in df.columns:
+        df = df[df["明细"].notna() & (df["明细"] != "") & (df["明细"] != "分数总和")]
+    return df[GROUP_COL].dropna().unique().tolist()
+
+# ==================== 时间点数据集 ====================
+class PeriodFrames(MutableMapping):
+    """时间点 → DataFrame 映射；增量时间点在首次读取时才物化"""
+
+    def __init__(self, snapshots: Dict[str, pd.DataFrame], deltas: Optional[Dict[str, pd.DataFrame]] = None,
+                 manifest: Optional[Dict[str, str]] = None, order: Optional[List[str]] = None):
+        self.snapshots = dict(snapshots)
+        self.deltas = dict(deltas or {})
+        self.manifest = {k: v for k, v in (manifest or {}).items() if k in self.deltas}
+        # 基准缺失或成环的增量时间点无法物化，直接忽略
+        for name in list(self.deltas):
+            seen, cur = set(), name
+            while cur in self.deltas and cur not in seen:
+                seen.add(cur)
+                cur = self.manifest.get(cur, "")
+            if cur not in self.snapshots:
+                self.deltas.pop(name)
+        self.manifest = {k: v for k, v in self.manifest.items() if k in self.deltas}
+        names = order if order is not None else list(self.snapshots) + list(self.deltas)
+        self._order = [n for n in names if n in self.snapshots or n in self.deltas]
+        self._memo: Dict[str, pd.DataFrame] = {}
+        self._parts: Dict[str, Tuple[pd.DataFrame, Dict[str, Tuple[int, int]]]] = {}
+        self._groups: Optional[List[str]] = None
+        self._sheet_groups: Dict[str, List[str]] = {}
+        self._sizes: Dict[Tuple[str, str], int] = {}
+
+    # ---------- Mapping 接口 ----------
+    def __getitem__(self, name: str) -> pd.DataFrame:
+        if name in self.snapshots:
+            return self.snapshots[name]
+        if name not in self.deltas:
+            raise KeyError(name)
+        if name not in self._memo:
+            # 沿增量链回溯到最近的快照，再依次叠加
+            chain, cur = [], name
+            while cur in self.deltas and cur not in self._memo:
+                chain.append(cur)
+                cur = self.manifest[cur]
+            frame = self._memo.get(cur, self.snapshots.get(cur))
+            for n in reversed(chain):
+                frame = apply_delta(frame, self.deltas[n], n)
+                self._memo[n] = frame
+        return self._memo[name]
+
+    def __setitem__(self, name: str, frame: pd.DataFrame):
+        self.deltas.pop(name, None)
+        self.manifest.pop(name, None)
+        self.snapshots[name] = frame
+        if name not in self._order:
+            self._order.append(name)
+        self._invalidate()
+
+    def __delitem__(self, name: str):
+        self.snapshots.pop(name, None)
+        self.deltas.pop(name, None)
+        self.manifest.pop(name, None)
+        self._order.remove(name)
+        self._invalidate()
+
+    def __iter__(self):
+        return iter(self._order)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def _invalidate(self):
+        self._memo.clear()
+        self._parts.clear()
+        self._groups = None
+        self._sheet_groups.clear()
+        self._sizes.clear()
+
+    def memory_bytes(self) -> int:
+        """已加载快照、增量及物化/分区结果的内存占用（每张表只统计一次）"""
+        frames = [("快照", n, f) for n, f in self.snapshots.items()]
+        frames += [("增量", n, f) for n, f in self.deltas.items()]
+        frames += [("物化", n, f) for n, f in list(self._memo.items())]
+        frames += [("分区", n, p[0]) for n, p in list(self._parts.items())]
+        total = 0
+        for kind, name, frame in frames:
+            if (kind, name) not in self._sizes:
+                self._sizes[(kind, name)] = int(frame.memory_usage(deep=True).sum())
+            total += self._sizes[(kind, name)]
+        return total
+
+    # ---------- 分组分区索引 ----------
+    def partitions(self, name: str) -> Tuple[pd.DataFrame, Dict[str, Tuple[int, int]]]:
+        """时间点的分组分区（首次访问时构建并缓存）"""
+        if name not in self._parts:
+            self._parts[name] = partition_frame(self[name])
+        return self._parts[name]
+
+    def period_groups(self, name: str) -> List[str]:
+        """时间点的分组：已分区时取分区结果，否则读增量链上各原始表（不物化增量）"""
+        if name in self._parts:
+            return list(self._parts[name][1])
+        chain, cur = [], name
+        while cur in self.deltas:
+            chain.append(cur)
+            cur = self.manifest[cur]
+        groups = {}
+        for n in [cur] + chain[::-1]:
+            if n not in self._sheet_groups:
+                self._sheet_groups[n] = sheet_groups(self.snapshots[n] if n in self.snapshots else self.deltas[n])
+            for g in self._sheet_groups[n]:
+                groups.setdefault(g, None)
+        return list(groups)
+
+    def group_catalogue(self) -> List[str]:
+        """所有时间点出现过的分组（按首次出现顺序），只读原始表，不物化增量时间点"""
+        if self._groups is None:
+            groups = {}
+            for name in self._order:
+                for g in self.period_groups(name):
+                    groups.setdefault(g, None)
+            self._groups = list(groups)
+        return self._groups
+
+    def select(self, name: str, groups: List[str]) -> pd.DataFrame:
+        """直接拼接所选分组的分区切片；未选分组时返回全部行。耗时只与所选行数相关"""
+        frame, offsets = self.partitions(name)
+        if not groups:
+            groups = list(offsets)
+        spans = [offsets[g] for g in dict.fromkeys(groups) if g in offsets]
+        if not spans:
+            return frame.iloc[0:0]
+        if len(spans) == 1:
+            return frame.iloc[spans[0][0]:spans[0][1]]
+        parts = [frame.iloc[a:b] for a, b in spans]
+        return pd.concat(parts).sort_index()
+
+    def merged(self, keys: List[str], groups: List[str]) -> pd.DataFrame:
+        """多个时间点所选分组的合并视图"""
+        dfs = [self.select(k, groups) for k in keys if k in self]
+        if not dfs:
+            return pd.DataFrame()
+        return pd.concat(dfs, axis=0, ignore_index=True)
+
+    # ---------- 增量链 ----------
+    def is_delta(self, name: str) -> bool:
+        return name in self.deltas
+
+    def row_count(self, name: str) -> Optional[int]:
+        """时间点行数；增量时间点尚未物化时返回 None（不为统计而物化）"""
+        if name in self.snapshots:
+            return len(self.snapshots[name])
+        return len(self._memo[name]) if name in self._memo else None
+
+    def chain_depth(self, name: str) -> int:
+        depth, cur = 0, name
+        while cur in self.deltas and depth <= len(self.deltas):
+            depth += 1
+            cur = self.manifest.get(cur, "")
+        return depth
+
+    def encode(self, name: str, frame: pd.DataFrame, base: str) -> Tuple[pd.DataFrame, str]:
+        """决定时间点的存储形式，返回 (写入表, 基准)；基准为空表示完整快照"""
+        if base and base in self and self.chain_depth(base) + 1 <= REBASE_DEPTH:
+            delta = diff_frames(self[base], frame)
+            if delta is not None and len(delta) <= len(frame) * REBASE_RATIO:
+                return delta, base
+        return frame, ""
+
+    def plan_save(self, name: str, frame: pd.DataFrame) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+        """保存某时间点：自身按原基准重新编码，直接继承它的时间点改为相对新数据重新编码，
+        保证其他时间点的物化结果不变。返回 (需写入的表, 新索引)"""
+        manifest = dict(self.manifest)
+        writes = {}
+        sheet, base = self.encode(name, frame, manifest.get(name, ""))
+        writes[name] = sheet
+        if base:
+            manifest[name] = base
+        else:
+            manifest.pop(name, None)
+
+        children = [c for c, b in self.manifest.items() if b == name]
+        if children:
+            snapshots, deltas = dict(self.snapshots), dict(self.deltas)
+            if base:
+                snapshots.pop(name, None)
+                deltas[name] = sheet
+            else:
+                deltas.pop(name, None)
+                snapshots[name] = frame
+            planned = PeriodFrames(snapshots, deltas, manifest, self._order)
+            for c in children:
+                child_sheet, child_base = planned.encode(c, self[c], name)
+                writes[c] = child_sheet
+                if child_base:
+                    manifest[c] = child_base
+                else:
+                    manifest.pop(c, None)
+        return writes, manifest
+
+    def apply_plan(self, writes: Dict[str, pd.DataFrame], manifest: Dict[str, str]) -> "PeriodFrames":
+        """plan_save 结果写入后的数据集（不读文件），用于同一批次内连续规划多个时间点"""
+        snapshots, deltas = dict(self.snapshots), dict(self.deltas)
+        for name, sheet in writes.items():
+            if name in manifest:
+                snapshots.pop(name, None)
+                deltas[name] = sheet
+            else:
+                deltas.pop(name, None)
+                snapshots[name] = sheet
+        order = self._order + [n for n in writes if n not in self._order]
+        return PeriodFrames(snapshots, deltas, manifest, order)
+
+# ==================== 读写工作簿 ====================
+def load_periods(file: str) -> Tuple[List[str], PeriodFrames, List[Tuple[str, str]]]:
+    """读取工作簿，返回 (时间点列表, 时间点数据集, [(级别, 提示)])；提示由调用方决定如何展示"""
+    messages = []
+    if not os.path.exists(file):
+        return [], PeriodFrames({}), messages
+    xpd = pd.ExcelFile(file)
+    frames = {}
+    deltas = {}
+    manifest = read_manifest(xpd)
+    required_cols = {"明细", "员工", "自评值", "互评值"}
+    period_names = [s for s in xpd.sheet_names if s != MANIFEST_SHEET]
+
+    for s in period_names:
+        try:
+            # 增量时间点：只读取变更行，物化推迟到首次使用
+            if s in manifest:
+                deltas[s] = pd.read_excel(xpd, sheet_name=s).fillna("")
+                continue
+            df0 = pd.read_excel(xpd, sheet_name=s)
+            if df0.empty:
+                continue
+            df0 = df0.fillna("")
+            if not required_cols.issubset(df0.columns):
+                messages.append(("warning", f"表 {s} 缺少必要列，已跳过。"))
+                continue
+
+            if df0.iloc[0, 0] == "分组":
+                groups = df0.iloc[0, 1:].tolist()
+                df0 = df0.drop(0).reset_index(drop=True)
+                emp_cols = [c for c in df0.columns if c not in ["明细", "自评值_数量总和", "互评值_数量总和", "编号"]]
+                group_map = {emp: groups[i] if i < len(groups) else DEFAULT_GROUP for i, emp in enumerate(emp_cols)}
+                df_long = df0.melt(
+                    id_vars=["明细"],
+                    value_vars=emp_cols,
+                    var_name="员工",
+                    value_name="临时值"
+                )
+                df_long["分组"] = df_long["员工"].map(group_map)
+                df_long["自评值"] = pd.to_numeric(df_long["临时值"], errors="coerce").fillna(0)
+                df_long["互评值"] = pd.to_numeric(df_long["临时值"], errors="coerce").fillna(0)
+                df_long = df_long.drop(columns=["临时值"], errors="ignore")
+                frames[s] = df_long
+            else:
+                if "分组" not in df0.columns:
+                    df0["分组"] = DEFAULT_GROUP
+                df0["自评值"] = pd.to_numeric(df0["自评值"], errors="coerce").fillna(0)
+                df0["互评值"] = pd.to_numeric(df0["互评值"], errors="coerce").fillna(0)
+                frames[s] = df0
+        except Exception as e:
+            messages.append(("error", f"读取 {s} 失败: {str(e)}"))
+    return period_names, PeriodFrames(frames, deltas, manifest, period_names), messages
+
+def write_periods(file_path: str, writes: Dict[str, pd.DataFrame], manifest: Optional[Dict[str, str]] = None):
+    """替换写入指定时间点表与索引表（manifest 为 None 时不改索引表），其余表保持不变；整体原子替换"""
+    with atomic_excel_writer(file_path, mode="a") as writer:
+        for sn, df0 in writes.items():
+            df0.to_excel(writer, sheet_name=sn, index=False)
+        if manifest is not None:
+            manifest_frame(manifest).to_excel(writer, sheet_name=MANIFEST_SHEET, index=False)
+
+# ==================== 分片存储 ====================
+# 分片索引文件与工作簿同名（jixiao.shards.json），记录每个时间点所在分片及其分组
+SHARD_SUFFIX = ".shards.json"
+OTHER_SHARD = "其他"
+
+def shard_manifest_path(file: str) -> str:
+    return os.path.splitext(file)[0] + SHARD_SUFFIX
+
+def shard_key(period: str) -> str:
+    """时间点所属分片：按年份（2025_10 → 2025），无法识别年份的归入“其他”"""
+    year = str(period).split("_")[0]
+    return year if year.isdigit() else OTHER_SHARD
+
+def period_sort_key(period: str) -> tuple:
+    """时间点按日期排序的键：2026_05 → 5 月，2026_Q2 → 季末 6 月；无法识别的排在最前"""
+    year, _, part = str(period).partition("_")
+    part = part.upper()
+    if part.startswith("Q") and part[1:].isdigit():
+        month = int(part[1:]) * 3
+    elif part.isdigit():
+        month = int(part)
+    else:
+        month = None
+    if not year.isdigit() or month is None:
+        return (0, 0, 0, str(period))
+    return (1, int(year), month, str(period))
+
+def shard_path(file: str, key: str) -> str:
+    base, ext = os.path.splitext(file)
+    return f"{base}_{key}{ext or '.xlsx'}"
+
+def _mtime(path: str) -> Optional[float]:
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+def _read_shard_manifest(file: str) -> Tuple[Dict[str, str], Dict[str, List[str]]]:
+    mp = shard_manifest_path(file)
+    with open(mp, encoding="utf-8") as f:
+        data = json.load(f)
+    base = os.path.dirname(mp)
+    periods = {p: os.path.join(base, name) for p, name in data.get("periods", {}).items()}
+    return periods, data.get("groups", {})
+
+def _write_shard_manifest(file: str, periods: Dict[str, str], groups: Dict[str, List[str]]):
+    """先写临时文件再替换，读取方不会看到写了一半的索引"""
+    mp = shard_manifest_path(file)
+    data = {
+        "periods": {p: os.path.basename(path) for p, path in periods.items()},
+        "groups": {p: groups.get(p, []) for p in periods},
+    }
+    tmp = mp + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, mp)
+
+def store_version(file: str) -> tuple:
+    """数据版本：未分片时为工作簿修改时间；分片时为索引文件及各分片的修改时间"""
+    if not os.path.exists(shard_manifest_path(file)):
+        return ((file, _mtime(file)),)
+    periods, _ = _read_shard_manifest(file)
+    mp = shard_manifest_path(file)
+    return ((mp, _mtime(mp)),) + tuple((path, _mtime(path)) for path in sorted(set(periods.values())))
+
+
+class ShardedPeriods(MutableMapping):
+    """时间点 → DataFrame 映射，数据分布在多个分片工作簿中；分片在首次访问其中的时间点时才加载。
+    未分片（没有索引文件）时整个工作簿就是唯一分片，打开时立即加载，行为与拆分前一致。
+    增量链不跨分片：跨年份继承上期时新时间点存为完整快照。"""
+
+    def __init__(self, file: str, periods: Dict[str, str], groups: Optional[Dict[str, List[str]]] = None,
+                 sharded: bool = False, loader=load_periods, preloaded: Optional[Dict[str, PeriodFrames]] = None):
+        self.file = file
+        self.sharded = sharded
+        self.periods = dict(periods)
+        self.groups = dict(groups or {})
+        self.loader = loader
+        self.messages: List[Tuple[str, str]] = []
+        self._shards: Dict[str, PeriodFrames] = dict(preloaded or {})
+        self._lock = threading.RLock()
+
+    @classmethod
+    def open(cls, file: str, loader=load_periods) -> "ShardedPeriods":
+        if os.path.exists(shard_manifest_path(file)):
+            periods, groups = _read_shard_manifest(file)
+            return cls(file, periods, groups, sharded=True, loader=loader)
+        store = cls(file, {}, loader=loader)
+        sheets, _ = store._load(file)
+        store.periods = {s: file for s in sheets}
+        return store
+
+    @classmethod
+    def from_frames(cls, file: str, frames: PeriodFrames) -> "ShardedPeriods":
+        """用内存中的数据构造单分片数据集（示例数据等）"""
+        return cls(file, {s: file for s in frames}, preloaded={file: frames})
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    # ---------- 分片加载 ----------
+    def _load(self, path: str) -> Tuple[List[str], PeriodFrames]:
+        with self._lock:
+            if path not in self._shards:
+                sheets, frames, messages = self.loader(path)
+                self.messages += messages
+                self._shards[path] = frames
+                return sheets, frames
+            return list(self._shards[path]), self._shards[path]
+
+    def shard(self, name: str) -> PeriodFrames:
+        """时间点所在分片（按需加载）"""
+        return self._load(self.file_for(name))[1]
+
+    def loaded(self, name: str) -> bool:
+        return self.file_for(name) in self._shards
+
+    def file_for(self, name: str) -> str:
+        if name in self.periods:
+            return self.periods[name]
+        return shard_path(self.file, shard_key(name)) if self.sharded else self.file
+
+    def files(self) -> List[str]:
+        return list(dict.fromkeys(self.periods.values()))
+
+    def period_names(self) -> List[str]:
+        """索引中登记的全部时间点（不触发加载）"""
+        return list(self.periods)
+
+    def latest(self) -> List[str]:
+        """日期最新的一个有数据的时间点（从后往前按需加载分片，通常只加载当年分片）"""
+        ordered = sorted(self.periods, key=period_sort_key, reverse=True)
+        return next(([s] for s in ordered if s in self), [])
+
+    # ---------- Mapping 接口 ----------
+    def __getitem__(self, name: str) -> pd.DataFrame:
+        if name not in self.periods:
+            raise KeyError(name)
+        return self.shard(name)[name]
+
+    def __setitem__(self, name: str, frame: pd.DataFrame):
+        self.shard(name)[name] = frame
+        self.periods.setdefault(name, self.file_for(name))
+
+    def __delitem__(self, name: str):
+        del self.shard(name)[name]
+        self.periods.pop(name, None)
+
+    def __iter__(self):
+        for name, path in self.periods.items():
+            # 已加载的分片以实际读到的时间点为准（跳过空表/缺列的表）
+            if path in self._shards and name not in self._shards[path]:
+                continue
+            yield name
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __contains__(self, name) -> bool:
+        """只加载该时间点所在分片，不物化数据"""
+        return name in self.periods and name in self.shard(name)
+
+    # ---------- 查询（跨分片合并） ----------
+    def partitions(self, name: str) -> Tuple[pd.DataFrame, Dict[str, Tuple[int, int]]]:
+        return self.shard(name).partitions(name)
+
+    def select(self, name: str, groups: List[str]) -> pd.DataFrame:
+        return self.shard(name).select(name, groups)
+
+    def merged(self, keys: List[str], groups: List[str]) -> pd.DataFrame:
+        """多个时间点（可跨分片）所选分组的合并视图"""
+        dfs = [self.select(k, groups) for k in keys if k in self]
+        if not dfs:
+            return pd.DataFrame()
+        return pd.concat(dfs, axis=0, ignore_index=True)
+
+    def group_catalogue(self) -> List[str]:
+        """分片模式下直接读索引中记录的分组，不加载分片"""
+        groups = {}
+        for name in self:
+            names = self.groups.get(name) if self.sharded and name in self.groups else self.shard(name).period_groups(name)
+            for g in names:
+                groups.setdefault(g, None)
+        return list(groups)
+
+    def is_delta(self, name: str) -> bool:
+        return self.shard(name).is_delta(name)
+
+    def row_count(self, name: str) -> Optional[int]:
+        return self.shard(name).row_count(name)
+
+    def chain_depth(self, name: str) -> int:
+        return self.shard(name).chain_depth(name)
+
+    @property
+    def manifest(self) -> Dict[str, str]:
+        """已加载分片的增量索引"""
+        return {k: v for frames in list(self._shards.values()) for k, v in frames.manifest.items()}
+
+    @property
+    def snapshots(self) -> Dict[str, pd.DataFrame]:
+        return {k: v for frames in list(self._shards.values()) for k, v in frames.snapshots.items()}
+
+    @property
+    def deltas(self) -> Dict[str, pd.DataFrame]:
+        return {k: v for frames in list(self._shards.values()) for k, v in frames.deltas.items()}
+
+    def memory_bytes(self) -> int:
+        return sum(frames.memory_bytes() for frames in list(self._shards.values()))
+
+    # ---------- 写入（只改写受影响的分片） ----------
+    def _register(self, name: str, path: str, frame: pd.DataFrame):
+        """登记写入结果；被改写的分片下次访问时重新加载"""
+        self._shards.pop(path, None)
+        self.periods.setdefault(name, path)
+        if self.sharded:
+            self.groups[name] = sheet_groups(frame)
+            _write_shard_manifest(self.file, self.periods, self.groups)
+
+    def save(self, name: str, frame: pd.DataFrame):
+        """保存时间点：在所在分片内重新编码自身及直接继承它的时间点"""
+        self.save_many({name: frame})
+
+    def save_many(self, frames: Dict[str, pd.DataFrame]) -> int:
+        """批量保存多个时间点：同一分片内依次规划，每个分片只打开、替换一次。返回写入的表数"""
+        by_path: Dict[str, Dict[str, pd.DataFrame]] = {}
+        for name, frame in frames.items():
+            by_path.setdefault(self.file_for(name), {})[name] = frame
+        sheets = 0
+        for path, items in by_path.items():
+            shard = self._load(path)[1] if os.path.exists(path) else PeriodFrames({})
+            writes: Dict[str, pd.DataFrame] = {}
+            manifest = dict(shard.manifest)
+            for name, frame in items.items():
+                planned, manifest = shard.plan_save(name, frame)
+                shard = shard.apply_plan(planned, manifest)
+                writes.update(planned)
+            write_periods(path, writes, manifest)
+            sheets += len(writes)
+        for path, items in by_path.items():
+            for name, frame in items.items():
+                self._register(name, path, frame)
+        return sheets
+
+    def create(self, name: str, prev: Optional[str] = None) -> bool:
+        """新建时间点，返回是否继承了上期数据。同分片继承只写空增量表（写时复制）；
+        跨分片或上期增量链已达 REBASE_DEPTH 时写完整快照，避免只建不改的时间点无限拉长增量链"""
+        path = self.file_for(name)
+        if prev is not None and prev in self:
+            base = self[prev]
+            if self.file_for(prev) == path and self.chain_depth(prev) + 1 <= REBASE_DEPTH:
+                manifest = dict(self.shard(prev).manifest)
+                manifest[name] = prev
+                write_periods(path, {name: empty_delta(base)}, manifest)
+            else:
+                snapshot = base.copy()
+                if "时间点" in snapshot.columns:
+                    snapshot["时间点"] = name
+                write_periods(path, {name: snapshot})
+            self._register(name, path, base)
+            return True
+        template = pd.DataFrame(columns=TEMPLATE_COLS)
+        write_periods(path, {name: template})
+        self._register(name, path, template)
+        return False
+
+    def recalc_sums(self) -> int:
+        """重新计算各分片所有完整快照表的总和列（索引表和增量表原样保留），返回处理的工作簿数"""
+        files = [f for f in self.files() if os.path.exists(f)]
+        for path in files:
+            xls = pd.ExcelFile(path)
+            manifest = read_manifest(xls)
+            updated_frames = {}
+            for sheet_name in xls.sheet_names:
+                df0 = pd.read_excel(xls, sheet_name=sheet_name)
+                if sheet_name != MANIFEST_SHEET and sheet_name not in manifest:
+                    df0 = calc_all_sum(df0)
+                updated_frames[sheet_name] = df0
+            with atomic_excel_writer(path, mode="w") as writer:
+                for sn, df0 in updated_frames.items():
+                    df0.to_excel(writer, sheet_name=sn, index=False)
+            self._shards.pop(path, None)
+        return len(files)
+
+def split_by_year(file: str) -> str:
+    """把单个工作簿按年份拆成分片工作簿并写出分片索引，原工作簿保留不动作为归档。
+    分片内的增量链原样保留，基准落在其他分片的增量时间点物化为完整快照。返回索引文件路径"""
+    _, frames, _ = load_periods(file)
+    by_path: Dict[str, List[str]] = {}
+    for name in frames:
+        by_path.setdefault(shard_path(file, shard_key(name)), []).append(name)
+
+    periods, groups = {}, {}
+    for path, names in by_path.items():
+        manifest = {}
+        with atomic_excel_writer(path, mode="w") as writer:
+            for name in names:
+                base = frames.manifest.get(name)
+                if frames.is_delta(name) and base in names:
+                    frames.deltas[name].to_excel(writer, sheet_name=name, index=False)
+                    manifest[name] = base
+                else:
+                    frames[name].to_excel(writer, sheet_name=name, index=False)
+            manifest_frame(manifest).to_excel(writer, sheet_name=MANIFEST_SHEET, index=False)
+        for name in names:
+            periods[name] = path
+            groups[name] = frames.period_groups(name)
+    _write_shard_manifest(file, periods, groups)
+    return shard_manifest_path(file)
@@ -0,0 +1,244 @@
+"""单写者队列：大屏上所有对 jixiao.xlsx（及分片）的修改都交给一个后台线程串行执行
+
+- 保存、新建时间点、一键更新总和、按年份拆分都以操作形式入队，调用方拿到 Future 等待结果
+- 每批取出队列中积压的全部操作：同一时间点的多次编辑合并成一次写入，同一分片只打开、替换一次
+- 乐观并发：编辑开始时记下数据指纹（frame_token），写入前与磁盘上的最新数据比对；
+  基于同一版本的并发编辑只要改动的行互不冲突就合并，否则后到的编辑被拒绝（StaleEditError）
+"""
+import queue
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from jineng_store import (
+    KEY_COLS, ShardedPeriods, apply_delta, diff_frames, frame_token, load_periods, split_by_year,
+)
+
+
+class StaleEditError(Exception):
+    """编辑所基于的数据已被他人修改（或要新建的时间点已存在）"""
+
+
+class _Op:
+    __slots__ = ("kind", "name", "frame", "token", "prev", "future", "submitted")
+
+    def __init__(self, kind: str, name: Optional[str] = None, frame: Optional[pd.DataFrame] = None,
+                 token: Optional[str] = None, prev: Optional[str] = None):
+        self.kind = kind
+        self.name = name
+        self.frame = frame
+        self.token = token
+        self.prev = prev
+        self.future: Future = Future()
+        self.submitted = time.time()
+
+
+def _row_changes(delta: pd.DataFrame) -> Dict[tuple, tuple]:
+    """增量表 → {主键: 改动后的行}，用于判断两次编辑是否改了同一行"""
+    d = delta.fillna("").astype(str)
+    keys = d[KEY_COLS].itertuples(index=False, name=None)
+    rows = d.drop(columns=KEY_COLS).itertuples(index=False, name=None)
+    return dict(zip(keys, rows))
+
+
+class _PendingEdit:
+    """批次内某个时间点的待写入结果：基准数据、合并后的数据、已改动的行"""
+    __slots__ = ("base_token", "base", "frame", "changes", "ops")
+
+    def __init__(self, base_token: str, base: Optional[pd.DataFrame], frame: pd.DataFrame,
+                 changes: Optional[Dict[tuple, tuple]], op: _Op):
+        self.base_token = base_token
+        self.base = base
+        self.frame = frame
+        self.changes = changes
+        self.ops = [op]
+
+
+class WorkbookWriter:
+    """进程内唯一的写入线程。on_commit 在每批写入落盘后调用（例如清空缓存）"""
+
+    def __init__(self, file: str, loader=load_periods, on_commit: Optional[Callable[[], Any]] = None,
+                 window: int = 200):
+        self.file = file
+        self.loader = loader
+        self.on_commit = on_commit
+        self._queue: "queue.Queue[_Op]" = queue.Queue()
+        self._lock = threading.Lock()
+        # 最近批次：(完成时刻, 操作数, 写入表数, 写入耗时秒, 操作排队等待总秒数)
+        self._batches: deque = deque(maxlen=window)
+        self.submitted = self.applied = self.coalesced = self.rejected = self.failed = 0
+        self.batch_count = 0
+        self.peak_depth = 0
+        self.busy = False
+        self._thread = threading.Thread(target=self._loop, name="jineng-writer", daemon=True)
+        self._thread.start()
+
+    # ---------- 提交 ----------
+    def _submit(self, op: _Op) -> Future:
+        with self._lock:
+            self.submitted += 1
+            self._queue.put(op)
+            self.peak_depth = max(self.peak_depth, self._queue.qsize())
+        return op.future
+
+    def save(self, name: str, frame: pd.DataFrame, token: str) -> Future:
+        """保存时间点；token 为编辑开始时该时间点数据的 frame_token"""
+        return self._submit(_Op("save", name, frame, token))
+
+    def create(self, name: str, prev: Optional[str] = None) -> Future:
+        """新建时间点，结果为是否继承了上期数据"""
+        return self._submit(_Op("create", name, prev=prev))
+
+    def recalc_sums(self) -> Future:
+        """重新计算所有工作簿的总和列，结果为处理的工作簿数"""
+        return self._submit(_Op("recalc"))
+
+    def split_by_year(self) -> Future:
+        """把单个工作簿按年份拆成分片，结果为分片索引文件路径"""
+        return self._submit(_Op("split"))
+
+    # ---------- 后台线程 ----------
+    def _loop(self):
+        while True:
+            ops = [self._queue.get()]
+            # 写入期间积压的操作一并取出，合并成一批
+            while True:
+                try:
+                    ops.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            with self._lock:
+                self.busy = True
+            start = time.perf_counter()
+            sheets = 0
+            try:
+                sheets = self._apply(ops)
+            except Exception as e:
+                for op in ops:
+                    if not op.future.done():
+                        op.future.set_exception(e)
+            secs = time.perf_counter() - start
+            end = time.time()
+            with self._lock:
+                self.busy = False
+                self.batch_count += 1
+                for op in ops:
+                    exc = op.future.exception()
+                    if exc is None:
+                        self.applied += 1
+                    elif isinstance(exc, StaleEditError):
+                        self.rejected += 1
+                    else:
+                        self.failed += 1
+                self._batches.append((end, len(ops), sheets, secs, sum(end - op.submitted for op in ops)))
+            if sheets and self.on_commit:
+                # 回调失败只记录，不能让写入线程退出（否则之后的写入全部挂起）
+                try:
+                    self.on_commit()
+                except Exception:
+                    traceback.print_exc(file=sys.stderr)
+
+    def _stage(self, store: ShardedPeriods, pending: Dict[str, _PendingEdit], op: _Op):
+        """把一次保存并入批次；与磁盘数据或批次内已有编辑冲突时抛 StaleEditError"""
+        name = op.name
+        edit = pending.get(name)
+        if edit is None:
+            current = store[name] if name in store else None
+            if current is None or op.token != frame_token(current):
+                raise StaleEditError(f"时间点 {name} 已被其他人修改，请刷新后重新编辑")
+            delta = diff_frames(current, op.frame)
+            pending[name] = _PendingEdit(op.token, current, op.frame,
+                                         _row_changes(delta) if delta is not None else None, op)
+            return
+        # 同一批次内基于同一版本的另一次编辑：改动的行不冲突才合并
+        delta = diff_frames(edit.base, op.frame) if op.token == edit.base_token else None
+        if delta is None or edit.changes is None:
+            raise StaleEditError(f"时间点 {name} 正在被其他人保存，请刷新后重新编辑")
+        changes = _row_changes(delta)
+        conflicts = [k for k, row in changes.items() if k in edit.changes and edit.changes[k] != row]
+        if conflicts:
+            raise StaleEditError(f"时间点 {name} 的 {len(conflicts)} 行已被其他人修改，请刷新后重新编辑")
+        edit.frame = apply_delta(edit.frame, delta, name)
+        edit.changes.update(changes)
+        edit.ops.append(op)
+        with self._lock:
+            self.coalesced += 1
+
+    def _apply(self, ops: List[_Op]) -> int:
+        """按提交顺序执行一批操作，返回写入的表数。每批重新打开数据，外部修改也参与版本比对"""
+        store = ShardedPeriods.open(self.file, loader=self.loader)
+        pending: Dict[str, _PendingEdit] = {}
+        sheets = 0
+
+        def flush():
+            nonlocal sheets
+            if not pending:
+                return
+            edits = list(pending.values())
+            try:
+                sheets += store.save_many({name: e.frame for name, e in pending.items()})
+                for e in edits:
+                    for op in e.ops:
+                        op.future.set_result(True)
+            except Exception as exc:
+                for e in edits:
+                    for op in e.ops:
+                        op.future.set_exception(exc)
+            pending.clear()
+
+        for op in ops:
+            try:
+                if op.kind == "save":
+                    self._stage(store, pending, op)
+                    continue
+                # 其余操作依赖此前的保存结果，先落盘
+                flush()
+                if op.kind == "create":
+                    if op.name in store.period_names():
+                        raise StaleEditError(f"时间点 {op.name} 已存在！")
+                    op.future.set_result(store.create(op.name, op.prev))
+                    sheets += 1
+                elif op.kind == "recalc":
+                    files = store.recalc_sums()
+                    sheets += files
+                    op.future.set_result(files)
+                else:
+                    index_file = split_by_year(self.file)
+                    # 之后的操作按分片布局重新打开
+                    store = ShardedPeriods.open(self.file, loader=self.loader)
+                    sheets += len(store.files())
+                    op.future.set_result(index_file)
+            except Exception as exc:
+                op.future.set_exception(exc)
+        flush()
+        return sheets
+
+    # ---------- 指标 ----------
+    def stats(self, horizon: float = 300.0) -> Dict[str, Any]:
+        """队列深度、吞吐（最近 horizon 秒）、批次耗时与各类操作计数"""
+        now = time.time()
+        with self._lock:
+            recent = [b for b in self._batches if now - b[0] <= horizon]
+            ops = sum(b[1] for b in recent)
+            return {
+                "queue_depth": self._queue.qsize(),
+                "peak_depth": self.peak_depth,
+                "busy": self.busy,
+                "submitted": self.submitted,
+                "applied": self.applied,
+                "coalesced": self.coalesced,
+                "rejected": self.rejected,
+                "failed": self.failed,
+                "batches": self.batch_count,
+                "ops_per_min": ops / (horizon / 60),
+                "sheets_per_min": sum(b[2] for b in recent) / (horizon / 60),
+                "avg_batch_s": sum(b[3] for b in recent) / len(recent) if recent else 0.0,
+                "avg_wait_s": sum(b[4] for b in recent) / ops if ops else 0.0,
+                "last_batch_s": self._batches[-1][3] if self._batches else 0.0,
+            }
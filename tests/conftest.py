@@ -0,0 +1,16 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    """jixiao.xlsx 的临时副本，测试只改副本"""
+    path = tmp_path / "jixiao.xlsx"
+    shutil.copyfile(os.path.join(ROOT, "jixiao.xlsx"), path)
+    return str(path)
@@ -0,0 +1,111 @@
+import gzip
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+import jineng_api
+from jineng_api import AggregateAPI, make_server
+from jineng_store import split_by_year
+
+
+def _json(body: bytes) -> dict:
+    return json.loads(body.decode("utf-8"))
+
+
+@pytest.fixture
+def api(workbook):
+    return AggregateAPI(workbook)
+
+
+def test_etag_not_modified(api):
+    status, headers, body = api.handle("/api/employees?periods=2025_10", {})
+    assert status == 200
+    assert _json(body)["periods"] == ["2025_10"]
+    etag = headers["ETag"]
+    status, headers, body = api.handle("/api/employees?periods=2025_10", {"If-None-Match": etag})
+    assert (status, body) == (304, b"")
+    assert headers["ETag"] == etag
+    assert api.handle("/api/employees?periods=2025_10", {"If-None-Match": "W/" + etag})[0] == 304
+    # 参数不同则 ETag 不同
+    assert api.handle("/api/employees?periods=2025_12", {"If-None-Match": etag})[0] == 200
+
+
+def test_gzip(api):
+    _, plain_headers, plain = api.handle("/api/heatmap?periods=2025_10", {})
+    status, headers, body = api.handle("/api/heatmap?periods=2025_10", {"Accept-Encoding": "gzip, br"})
+    assert status == 200
+    assert "Content-Encoding" not in plain_headers
+    assert headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(body) == plain
+    assert len(body) < len(plain)
+
+
+def test_params_deduped_and_order_insensitive(api):
+    single = _json(api.handle("/api/tasks?periods=2025_10", {})[2])
+    repeated = _json(api.handle("/api/tasks?periods=2025_10&periods=2025_10,2025_10", {})[2])
+    assert repeated["items"] == single["items"]
+    a = api.handle("/api/tasks?periods=2025_10,2025_12", {})[1]["ETag"]
+    b = api.handle("/api/tasks?periods=2025_12&periods=2025_10", {})[1]["ETag"]
+    assert a == b
+
+
+def test_errors(api, monkeypatch):
+    status, _, body = api.handle("/api/employees?periods=1999_01", {})
+    assert status == 400 and "1999_01" in _json(body)["error"]
+    status, _, body = api.handle("/api/unknown", {})
+    assert status == 404 and "error" in _json(body)
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("聚合失败")
+    monkeypatch.setattr(jineng_api, "score_totals", broken)
+    status, headers, body = api.handle("/api/tasks?periods=2025_12", {})
+    assert status == 500
+    assert headers["Content-Type"].startswith("application/json")
+    assert "聚合失败" in _json(body)["error"]
+
+
+def test_periods_does_not_load_shards(workbook):
+    split_by_year(workbook)
+    api = AggregateAPI(workbook)
+    status, _, body = api.handle("/api/periods", {})
+    assert status == 200
+    periods = _json(body)["periods"]
+    assert [p["时间点"] for p in periods] == ["2025_10", "2025_12", "2026_03"]
+    assert all(p["存储方式"] is None for p in periods)
+    _, frames = api.data()
+    assert not any(frames.loaded(p["时间点"]) for p in periods)
+
+    # 查询过的分片已加载，再列时间点时给出存储方式
+    assert api.handle("/api/employees?periods=2026_03", {})[0] == 200
+    periods = {p["时间点"]: p["存储方式"] for p in _json(api.handle("/api/periods", {})[2])["periods"]}
+    assert periods == {"2025_10": None, "2025_12": None, "2026_03": "快照"}
+
+
+def test_server_round_trip(api):
+    server = make_server(api, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        with urllib.request.urlopen(base + "/api/groups") as resp:
+            assert resp.status == 200
+            body = resp.read()
+            etag = resp.headers["ETag"]
+        assert body == api.handle("/api/groups", {})[2]
+        assert _json(body)["groups"]
+
+        request = urllib.request.Request(base + "/api/groups", headers={"If-None-Match": etag})
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            urllib.request.urlopen(request)
+        assert exc.value.code == 304
+
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            urllib.request.urlopen(base + "/api/nothing")
+        assert exc.value.code == 404
+        assert "error" in _json(exc.value.read())
+    finally:
+        server.shutdown()
+        server.server_close()
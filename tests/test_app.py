@@ -0,0 +1,74 @@
+import os
+import time
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from conftest import ROOT
+
+APP = os.path.join(ROOT, "2026-1jineng.py")
+
+
+@pytest.fixture
+def app_dir(workbook, monkeypatch):
+    """在临时副本所在目录运行大屏；进程级缓存和写入线程每个测试重新创建"""
+    monkeypatch.chdir(os.path.dirname(workbook))
+    st.cache_resource.clear()
+    yield workbook
+    st.cache_resource.clear()
+
+
+def _session(view: str) -> AppTest:
+    at = AppTest.from_file(APP, default_timeout=120).run()
+    [r for r in at.sidebar.radio if r.label == "切换视图"][0].set_value(view).run()
+    return at
+
+
+def _edit_session() -> AppTest:
+    return _session("编辑数据")
+
+
+def _cache_misses(at: AppTest) -> dict:
+    at.run()
+    stats = [d.value for d in at.dataframe if "缓存" in d.value.columns][0]
+    return stats.set_index("缓存")["未命中"].to_dict()
+
+
+def _save(at: AppTest):
+    [b for b in at.button if "保存" in b.label][0].click().run()
+    assert not at.exception
+    return [s.value for s in at.success], [e.value for e in at.error]
+
+
+def test_repeated_saves_in_one_session(app_dir):
+    at = _edit_session()
+    for _ in range(3):
+        success, errors = _save(at)
+        assert errors == []
+        assert any("已保存" in s for s in success)
+
+
+def test_concurrent_save_rejected_then_retry(app_dir):
+    a, b = _edit_session(), _edit_session()
+    success, errors = _save(a)
+    assert errors == [] and any("已保存" in s for s in success)
+    success, errors = _save(b)
+    assert any("保存被拒绝" in e for e in errors)
+    # 被拒绝后编辑基准换成最新数据，重新保存即可成功
+    success, errors = _save(b)
+    assert errors == [] and any("已保存" in s for s in success)
+
+
+def test_save_warms_up_without_rerun(app_dir):
+    editor, wall, ops = _session("编辑数据"), _session("单页模式"), _session("运维监控")
+    _save(editor)
+    # 不刷新任何会话：预热由写入线程的提交回调启动
+    time.sleep(8)
+    ops.run()
+    warm = [c.value for c in ops.caption if "缓存预热" in c.value][0]
+    assert "已完成" in warm and "：0/" not in warm
+    before = _cache_misses(ops)
+    wall.run()
+    assert not wall.exception
+    assert _cache_misses(ops) == before
@@ -0,0 +1,99 @@
+import threading
+import time
+
+from jineng_cache import CacheManager, WarmupWorker
+
+
+def _wait(predicate, timeout=10.0):
+    deadline = time.time() + timeout
+    while not predicate():
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+def test_concurrent_builds_share_one_builder():
+    cache = CacheManager()
+    calls = []
+    started = threading.Event()
+
+    def builder():
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        return "值"
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(cache.get_or_build("图表", "k", builder)))
+    first.start()
+    started.wait(5)
+    results.append(cache.get_or_build("图表", "k", builder))
+    first.join()
+    assert results == ["值", "值"]
+    assert len(calls) == 1
+    assert cache.misses["图表"] == 1
+    assert cache.hits["图表"] == 1
+
+
+def test_waiter_builds_when_result_not_kept():
+    cache = CacheManager()
+    started, release = threading.Event(), threading.Event()
+
+    def stale_builder():
+        started.set()
+        release.wait(5)
+        return "旧"
+
+    first = threading.Thread(target=lambda: cache.get_or_build("图表", "k", stale_builder, keep=lambda: False))
+    first.start()
+    started.wait(5)
+    threading.Timer(0.1, release.set).start()
+    assert cache.get_or_build("图表", "k", lambda: "新") == "新"
+    first.join()
+    assert cache.get("图表", "k") == "新"
+
+
+def test_failed_build_not_cached_and_retried():
+    cache = CacheManager()
+
+    def broken():
+        raise RuntimeError("构建失败")
+
+    try:
+        cache.get_or_build("图表", "k", broken)
+    except RuntimeError:
+        pass
+    assert cache.get_or_build("图表", "k", lambda: "值") == "值"
+
+
+def test_submit_does_not_wait_for_task_list():
+    worker = WarmupWorker()
+    release = threading.Event()
+    ran = []
+
+    def make_tasks():
+        release.wait(5)
+        return [lambda: ran.append(1)]
+
+    start = time.perf_counter()
+    assert worker.submit("v1", make_tasks)
+    assert time.perf_counter() - start < 1
+    assert not worker.submit("v1", make_tasks)
+    assert worker.status()["running"]
+    release.set()
+    _wait(lambda: not worker.status()["running"])
+    assert ran == [1]
+    assert worker.status()["done"] == worker.status()["total"] == 1
+
+
+def test_new_version_cancels_pending_batch():
+    worker = WarmupWorker(max_workers=1)
+    release = threading.Event()
+    ran = []
+    worker.submit("v1", lambda: [release.wait] + [lambda: ran.append("v1")] * 3)
+    _wait(lambda: worker.status()["total"] == 4)
+    worker.submit("v2", lambda: [lambda: ran.append("v2")])
+    release.set()
+    _wait(lambda: not worker.status()["running"])
+    assert ran == ["v2"]
+    assert worker.status()["cancelled"] == 3
+    assert not worker.is_current("v1")
@@ -0,0 +1,22 @@
+import plotly.io as pio
+import pytest
+
+from jineng_report import aggregate, report_figures
+from jineng_store import ShardedPeriods
+
+
+@pytest.mark.parametrize("groups", [[], ["A8"]])
+def test_shared_aggregates_give_same_figures(workbook, groups):
+    df0 = ShardedPeriods.open(workbook).select("2025_12", groups)
+    aggs = aggregate(df0)
+    for dimension in ["自评分数", "互评分数", "双维度对比"]:
+        own = report_figures(df0, "2025_12", dimension)
+        shared = report_figures(df0, "2025_12", dimension, aggs)
+        assert [name for name, _ in own] == [name for name, _ in shared]
+        for (name, a), (_, b) in zip(own, shared):
+            assert pio.to_json(a) == pio.to_json(b), (name, dimension)
+
+
+def test_empty_selection_has_no_aggregates(workbook):
+    df0 = ShardedPeriods.open(workbook).select("2025_12", ["不存在的分组"])
+    assert aggregate(df0) == {}
@@ -0,0 +1,151 @@
+import pandas as pd
+import pandas.testing as pdt
+
+from jineng_store import (
+    KEY_COLS, REBASE_DEPTH, REBASE_RATIO, ShardedPeriods, apply_delta, diff_frames, frame_token,
+)
+
+BASE = "2026_03"
+
+
+def _rows(df: pd.DataFrame) -> pd.DataFrame:
+    """按主键排序后比较，不看行顺序"""
+    return df.sort_values(KEY_COLS).reset_index(drop=True)
+
+
+def _create(file: str, name: str, prev: str) -> ShardedPeriods:
+    ShardedPeriods.open(file).create(name, prev)
+    return ShardedPeriods.open(file)
+
+
+def test_diff_apply_round_trip(workbook):
+    base = ShardedPeriods.open(workbook)[BASE]
+    target = base.copy()
+    target.loc[target.index[0], "自评值"] = 3
+    target = target.drop(target.index[1])
+    extra = target.iloc[[0]].copy()
+    extra["员工"] = "新员工"
+    target = pd.concat([target, extra], ignore_index=True)
+    target["时间点"] = BASE
+
+    delta = diff_frames(base, target)
+    assert len(delta) == 3
+    out = apply_delta(base, delta, BASE)
+    cols = [c for c in base.columns if not c.endswith("_数量总和")]
+    pdt.assert_frame_equal(_rows(out[cols]), _rows(target[cols]))
+
+
+def test_create_then_edit_add_delete(workbook):
+    store = _create(workbook, "2026_04", BASE)
+    assert store.is_delta("2026_04")
+    assert store.manifest["2026_04"] == BASE
+    assert len(store.deltas["2026_04"]) == 0
+    inherited = store["2026_04"]
+    assert (inherited["时间点"] == "2026_04").all()
+    pdt.assert_frame_equal(inherited.drop(columns="时间点"), store[BASE].drop(columns="时间点"))
+
+    frame = inherited.copy()
+    frame.loc[frame.index[0], "自评值"] = 4
+    deleted = tuple(frame.loc[frame.index[2], KEY_COLS])
+    frame = frame.drop(frame.index[2])
+    added = frame.iloc[[0]].copy()
+    added["明细"] = "新增明细"
+    frame = pd.concat([frame, added], ignore_index=True)
+    store.save("2026_04", frame)
+
+    store = ShardedPeriods.open(workbook)
+    saved = store["2026_04"]
+    assert store.is_delta("2026_04")
+    assert len(store.deltas["2026_04"]) == 3
+    assert saved.loc[saved.index[0], "自评值"] == 4
+    assert "新增明细" in set(saved["明细"])
+    assert deleted not in set(saved[KEY_COLS].itertuples(index=False, name=None))
+    assert saved["自评值"].dtype == inherited["自评值"].dtype
+    # 基准时间点不受影响
+    pdt.assert_frame_equal(store[BASE], ShardedPeriods.open(workbook)[BASE])
+
+
+def test_child_unchanged_when_base_edited(workbook):
+    store = _create(workbook, "2026_04", BASE)
+    child = store["2026_04"].copy()
+    child.loc[child.index[0], "自评值"] = 2
+    child = child.drop(child.index[5])
+    store.save("2026_04", child)
+    store = ShardedPeriods.open(workbook)
+    before = store["2026_04"]
+    token = frame_token(before)
+
+    base = store[BASE].copy()
+    base.loc[base.index[3], "互评值"] = 3
+    store.save(BASE, base)
+
+    store = ShardedPeriods.open(workbook)
+    after = store["2026_04"]
+    assert store.is_delta("2026_04")
+    assert store[BASE].loc[3, "互评值"] == 3
+    pdt.assert_frame_equal(after, before)
+    assert frame_token(after) == token
+    # 增量表中的删除行读回为空白，不能把整数列变成浮点
+    assert after[["自评值", "互评值"]].dtypes.tolist() == store[BASE][["自评值", "互评值"]].dtypes.tolist()
+
+
+def test_child_rows_kept_when_base_deletes_them(workbook):
+    store = _create(workbook, "2026_04", BASE)
+    before = store["2026_04"]
+    base = store[BASE].drop(store[BASE].index[0])
+    store.save(BASE, base)
+    after = ShardedPeriods.open(workbook)["2026_04"]
+    pdt.assert_frame_equal(_rows(after), _rows(before))
+
+
+def test_create_rebases_at_depth(workbook):
+    names = [f"2026_{m:02d}" for m in range(4, 4 + REBASE_DEPTH + 2)]
+    prev = BASE
+    for name in names:
+        store = _create(workbook, name, prev)
+        prev = name
+    assert all(store.chain_depth(n) <= REBASE_DEPTH for n in names)
+    assert [store.is_delta(n) for n in names] == [True] * REBASE_DEPTH + [False, True]
+    pdt.assert_frame_equal(store[names[-1]].drop(columns="时间点"), store[BASE].drop(columns="时间点"))
+
+
+def test_save_rebases_at_depth(workbook):
+    store = ShardedPeriods.open(workbook)
+    frames = store.shard(BASE)
+    names = [BASE] + [f"2026_{m:02d}" for m in range(4, 4 + REBASE_DEPTH + 1)]
+    # 直接在内存中接出超过 REBASE_DEPTH 的增量链，模拟旧数据
+    for prev, name in zip(names, names[1:]):
+        manifest = dict(frames.manifest, **{name: prev})
+        frames = frames.apply_plan({name: diff_frames(frames[prev], frames[prev])}, manifest)
+    last = names[-1]
+    assert frames.chain_depth(last) == REBASE_DEPTH + 1
+    writes, manifest = frames.plan_save(last, frames[last])
+    assert last not in manifest
+    pdt.assert_frame_equal(writes[last], frames[last])
+
+
+def test_save_rebases_past_ratio(workbook):
+    store = _create(workbook, "2026_04", BASE)
+    frame = store["2026_04"].copy()
+    n = int(len(frame) * REBASE_RATIO) + 1
+    frame.loc[frame.index[:n], "自评值"] = frame["自评值"].iloc[:n] + 1
+    store.save("2026_04", frame)
+    store = ShardedPeriods.open(workbook)
+    assert not store.is_delta("2026_04")
+    assert (store["2026_04"]["自评值"].iloc[:n].values == frame["自评值"].iloc[:n].values).all()
+
+    # 变更行未超过比例时仍存为增量
+    store = _create(workbook, "2026_05", "2026_04")
+    frame = store["2026_05"].copy()
+    frame.loc[frame.index[0], "自评值"] = 9
+    store.save("2026_05", frame)
+    assert ShardedPeriods.open(workbook).is_delta("2026_05")
+
+
+def test_row_count_does_not_materialize(workbook):
+    store = _create(workbook, "2026_04", BASE)
+    assert store.row_count(BASE) == len(store[BASE])
+    assert store.row_count("2026_04") is None
+    assert store.shard("2026_04")._memo == {}
+    rows = len(store["2026_04"])
+    assert store.row_count("2026_04") == rows
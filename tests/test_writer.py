@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+
+from jineng_store import ShardedPeriods, frame_token, load_periods
+from jineng_writer import StaleEditError, WorkbookWriter
+
+BASE = "2026_03"
+TIMEOUT = 60
+
+
+@pytest.fixture
+def gated(workbook):
+    """写入线程在 gate 打开前卡在第一批，之后提交的操作会合并进同一批"""
+    gate = threading.Event()
+
+    def loader(file):
+        gate.wait(TIMEOUT)
+        return load_periods(file)
+
+    writer = WorkbookWriter(workbook, loader=loader)
+    blocker = writer.create("2026_04", BASE)
+    return writer, gate, blocker
+
+
+def _edit(frame, row, col, value):
+    frame = frame.copy()
+    frame.loc[frame.index[row], col] = value
+    return frame
+
+
+def test_coalesces_non_conflicting_edits(workbook, gated):
+    writer, gate, blocker = gated
+    base = ShardedPeriods.open(workbook)[BASE]
+    token = frame_token(base)
+    first = writer.save(BASE, _edit(base, 0, "自评值", 5), token)
+    second = writer.save(BASE, _edit(base, 1, "互评值", 6), token)
+    gate.set()
+    assert blocker.result(TIMEOUT) is True
+    assert first.result(TIMEOUT) is True
+    assert second.result(TIMEOUT) is True
+
+    saved = ShardedPeriods.open(workbook)[BASE]
+    assert saved.loc[0, "自评值"] == 5
+    assert saved.loc[1, "互评值"] == 6
+    stats = writer.stats()
+    assert stats["coalesced"] == 1
+    assert stats["batches"] == 2
+    assert stats["applied"] == 3
+
+
+def test_rejects_conflicting_edit_in_batch(workbook, gated):
+    writer, gate, blocker = gated
+    base = ShardedPeriods.open(workbook)[BASE]
+    token = frame_token(base)
+    first = writer.save(BASE, _edit(base, 0, "自评值", 5), token)
+    second = writer.save(BASE, _edit(base, 0, "自评值", 7), token)
+    gate.set()
+    assert first.result(TIMEOUT) is True
+    with pytest.raises(StaleEditError):
+        second.result(TIMEOUT)
+    assert ShardedPeriods.open(workbook)[BASE].loc[0, "自评值"] == 5
+    assert writer.stats()["rejected"] == 1
+
+
+def test_rejects_edit_on_stale_token(workbook):
+    writer = WorkbookWriter(workbook)
+    base = ShardedPeriods.open(workbook)[BASE]
+    token = frame_token(base)
+    assert writer.save(BASE, _edit(base, 0, "自评值", 5), token).result(TIMEOUT) is True
+    with pytest.raises(StaleEditError):
+        writer.save(BASE, _edit(base, 1, "自评值", 5), token).result(TIMEOUT)
+    # 基于最新版本的编辑可以保存
+    latest = ShardedPeriods.open(workbook)[BASE]
+    assert writer.save(BASE, _edit(latest, 1, "自评值", 5), frame_token(latest)).result(TIMEOUT) is True
+
+
+def test_create_existing_period_rejected(workbook):
+    writer = WorkbookWriter(workbook)
+    with pytest.raises(StaleEditError):
+        writer.create(BASE).result(TIMEOUT)